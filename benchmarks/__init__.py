@@ -0,0 +1,3 @@
+"""
+Handle benchmarks.
+"""
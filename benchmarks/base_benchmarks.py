@@ -0,0 +1,29 @@
+"""
+Base benchmark functions.
+"""
+import time
+from typing import Callable
+from typing import Tuple
+from typing import TypeVar
+
+Result = TypeVar("Result")
+
+
+def measure(function: Callable[[], Result], *, repeat: int = 3) -> Tuple[float, Result]:
+    """
+    Measure the best execution time of a function.
+
+    Args:
+        function: the function.
+        repeat: the number of executions.
+
+    Returns:
+        The best time in seconds.
+        The result of the last execution.
+    """
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time, result
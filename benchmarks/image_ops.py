@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark the operations over batches of images with NumPy and with Pillow.
+"""
+import io
+from typing import List
+
+from PIL import Image
+
+from benchmarks import base_benchmarks
+from cushead.console.assets import assets
+from cushead.generator import image_ops
+from cushead.generator import images
+
+# The icon sizes, which are flattened in a batch.
+ICON_SIZES = (57, 60, 72, 76, 114, 120, 128, 144, 152, 167, 180, 195, 196, 228, 512, 1024)
+# The portrait startup images sizes, whose logos are centered over canvases in a batch for each size.
+STARTUP_SIZES = ((2048, 2732), (1668, 2388), (1668, 2224), (1536, 2048), (1242, 2688), (1125, 2436), (828, 1792), (1242, 2208), (750, 1334), (640, 1136))
+BATCH_SIZE = 4
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    image = Image.open(io.BytesIO(assets.get_images().favicon_png.data))
+    image.load()
+    icons = [images.get_resized_image(image=image, width=size, height=size) for size in ICON_SIZES]
+    logos = {size: images.get_resized_image(image=image, width=logo_size, height=logo_size) for size in STARTUP_SIZES for logo_size in (images.get_startup_logo_size(width=size[0], height=size[1]),)}
+
+    def flatten_alpha(use_numpy: bool) -> List[Image.Image]:
+        return [flattened_icon for icon in icons for flattened_icon in image_ops.flatten_alpha(images=(icon,) * BATCH_SIZE, color="#ffffff", use_numpy=use_numpy)]
+
+    def pad_to_canvas(use_numpy: bool) -> List[Image.Image]:
+        return [
+            canvas
+            for (width, height), logo in logos.items()
+            for canvas in image_ops.pad_to_canvas(images=(logo,) * BATCH_SIZE, width=width, height=height, color="#ffffff", use_numpy=use_numpy)
+        ]
+
+    def contain(use_numpy: bool) -> List[Image.Image]:
+        return [padded_logo for (width, height), logo in logos.items() for padded_logo in image_ops.contain(images=(logo,) * BATCH_SIZE, width=width, height=height, use_numpy=use_numpy)]
+
+    print(f"Operations over batches of {BATCH_SIZE} images:")
+    for name, operation in (("flatten_alpha", flatten_alpha), ("pad_to_canvas", pad_to_canvas), ("contain", contain)):
+        pillow_time, pillow_images = base_benchmarks.measure(lambda operation=operation: operation(False))
+        if image_ops.get_numpy() is None:
+            print(f" - {name}: Pillow {pillow_time:.3f}s, NumPy isn't installed")
+            continue
+        numpy_time, numpy_images = base_benchmarks.measure(lambda operation=operation: operation(True))
+        same_pixels = all(pillow_image.tobytes() == numpy_image.tobytes() for pillow_image, numpy_image in zip(pillow_images, numpy_images))
+        print(f" - {name}: Pillow {pillow_time:.3f}s, NumPy {numpy_time:.3f}s ({pillow_time / numpy_time:.1f}x), same pixels: {same_pixels}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark the load of the favicon PNG and its resize to the startup images sizes, with a verification pass and a
+premultiplication per resize, and with a single decode and a shared premultiplied image.
+"""
+import io
+from typing import Tuple
+
+from PIL import Image
+
+from benchmarks import base_benchmarks
+from cushead.console.assets import assets
+from cushead.generator import image_ops
+from cushead.generator import images
+
+# The startup images sizes, which are the biggest sizes to which generate_images resizes the favicon PNG.
+SIZES = tuple(
+    size
+    for portrait_size in ((2048, 2732), (1668, 2388), (1668, 2224), (1536, 2048), (1242, 2688), (1125, 2436), (828, 1792), (1242, 2208), (750, 1334), (640, 1136))
+    for size in (portrait_size, portrait_size[::-1])
+)
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    data = assets.get_images().favicon_png.data
+
+    def load_twice() -> Image.Image:
+        image = Image.open(io.BytesIO(data))
+        image.verify()
+        image.close()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+
+    def load_once() -> Image.Image:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+
+    twice_time, image = base_benchmarks.measure(load_twice)
+    once_time, _ = base_benchmarks.measure(load_once)
+    print(f"Verify and decode: {twice_time:.3f}s")
+    print(f"Decode once: {once_time:.3f}s")
+
+    def resize_premultiplying() -> Tuple[Image.Image, ...]:
+        return tuple(image.resize(image_ops.get_contained_size(size=image.size, width=width, height=height), Image.LANCZOS) for width, height in SIZES)
+
+    def resize_premultiplied() -> Tuple[Image.Image, ...]:
+        pyramid = images.get_image_pyramid(image=image, sizes=SIZES)
+        return tuple(images.get_resized_image(image=image, width=width, height=height, pyramid=pyramid) for width, height in SIZES)
+
+    premultiplying_time, _ = base_benchmarks.measure(resize_premultiplying)
+    premultiplied_time, _ = base_benchmarks.measure(resize_premultiplied)
+    print(f"Resize, premultiplying the image each time: {premultiplying_time:.2f}s")
+    print(f"Resize from a shared premultiplied image: {premultiplied_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
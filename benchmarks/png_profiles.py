@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark the encoding of the resized images with each PNG encoder profile.
+"""
+import io
+from typing import List
+
+from PIL import Image
+
+from benchmarks import base_benchmarks
+from cushead.console.assets import assets
+from cushead.generator import config as generator_config
+from cushead.generator import images
+
+BACKGROUND_COLOR = "#ffffff"
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    image = Image.open(io.BytesIO(assets.get_images().favicon_png.data))
+    image.load()
+    outputs = {(output.width, output.height, output.opaque, output.startup) for output in images.RESIZED_IMAGES}
+    pyramid = images.get_image_pyramid(image=image, sizes=((width, height) for width, height, _, _ in outputs))
+    resized_images = []
+    for width, height, opaque, startup in sorted(outputs):
+        if startup:
+            resized_images.append(images.get_startup_image(image=image, width=width, height=height, background_color=BACKGROUND_COLOR, pyramid=pyramid))
+            continue
+        resized_image = images.get_resized_image(image=image, width=width, height=height, pyramid=pyramid)
+        resized_images.append(images.get_opaque_image(image=resized_image, background_color=BACKGROUND_COLOR) if opaque else resized_image)
+
+    print(f"Encode {len(resized_images)} resized images:")
+    balanced_bytes = 0
+    for name, png_profile in sorted(generator_config.PNG_PROFILES.items(), key=lambda item: item[0] != generator_config.DEFAULT_PNG_PROFILE):
+
+        def encode(png_profile: generator_config.PngProfile = png_profile) -> List[bytes]:
+            return [images.get_png_bytes(image=resized_image, png_profile=png_profile) for resized_image in resized_images]
+
+        encode_time, images_bytes = base_benchmarks.measure(encode)
+        total_bytes = sum(map(len, images_bytes))
+        balanced_bytes = balanced_bytes or total_bytes
+        saved_bytes = balanced_bytes - total_bytes
+        print(f" - {name}: {encode_time:.3f}s, {total_bytes / 1024:.0f} KiB, {saved_bytes / 1024:+.0f} KiB saved ({saved_bytes / balanced_bytes:+.1%}) over {generator_config.DEFAULT_PNG_PROFILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark the resize of the favicon PNG to all its sizes, from the source and from a downscale pyramid.
+"""
+import io
+from typing import Tuple
+
+from PIL import Image
+from PIL import ImageChops
+
+from benchmarks import base_benchmarks
+from cushead.console.assets import assets
+from cushead.generator import images
+
+# The sizes to which generate_images resizes the favicon PNG.
+SIZES = (
+    *((size, size) for size in (16, 30, 32, 44, 57, 60, 70, 72, 76, 96, 114, 120, 128, 144, 150, 152, 167, 180, 192, 194, 195, 196, 228, 310, 512, 1024)),
+    (310, 150),
+    *(
+        size
+        for portrait_size in ((2048, 2732), (1668, 2388), (1668, 2224), (1536, 2048), (1242, 2688), (1125, 2436), (828, 1792), (1242, 2208), (750, 1334), (640, 1136))
+        for size in (portrait_size, portrait_size[::-1])
+    ),
+)
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    image = Image.open(io.BytesIO(assets.get_images().favicon_png.data))
+    image.load()
+
+    def resize_from_source() -> Tuple[Image.Image, ...]:
+        return tuple(images.get_resized_image(image=image, width=width, height=height) for width, height in SIZES)
+
+    def resize_from_pyramid() -> Tuple[Image.Image, ...]:
+        pyramid = images.get_image_pyramid(image=image, sizes=SIZES)
+        return tuple(images.get_resized_image(image=image, width=width, height=height, pyramid=pyramid) for width, height in SIZES)
+
+    source_time, source_images = base_benchmarks.measure(resize_from_source)
+    pyramid_time, pyramid_images = base_benchmarks.measure(resize_from_pyramid)
+    max_alpha_difference = max(
+        ImageChops.difference(source_image.getchannel("A"), pyramid_image.getchannel("A")).getextrema()[1] for source_image, pyramid_image in zip(source_images, pyramid_images)
+    )
+
+    print(f"Resize {image.size[0]}x{image.size[1]} to {len(SIZES)} sizes:")
+    print(f" - from the source:  {source_time:.3f}s")
+    print(f" - from a pyramid:   {pyramid_time:.3f}s ({source_time / pyramid_time:.1f}x faster)")
+    print(f" - max alpha difference: {max_alpha_difference}/255")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark the startup of the CLI for the arguments that don't generate files from a config.
+"""
+import pathlib
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+from benchmarks import base_benchmarks
+
+# Packages that are only needed to generate the files from a config.
+HEAVY_PACKAGES = ("PIL", "jinja2", "schema")
+
+
+def get_imported_modules(*, args: List[str]) -> List[str]:
+    """
+    Execute the CLI in a new interpreter and get the modules that it imports, using the -X importtime option.
+
+    Args:
+        args: the CLI arguments.
+
+    Returns:
+        The names of the imported modules.
+    """
+    code = f"from cushead.console import console; console.init(args={args!r})"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=False)
+    return [line.rsplit("|", 1)[1].strip() for line in process.stderr.splitlines() if line.startswith("import time:") and "|" in line]
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        for args in (["--help"], ["--default", str(pathlib.Path(folder) / "config.json")]):
+            best_time, modules = base_benchmarks.measure(lambda args=args: get_imported_modules(args=args), repeat=5)
+            heavy_modules = sorted({module.split(".")[0] for module in modules} & set(HEAVY_PACKAGES))
+            print(f"{' '.join(args[:1])}: {best_time * 1000:.0f}ms, {len(modules)} modules imported, heavy packages: {', '.join(heavy_modules) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Generate the files of a config in memory, to use the package from other python programs.
+"""
+import pathlib
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+from cushead.generator import cache as generator_cache
+from cushead.generator import config as generator_config
+from cushead.generator import files
+
+
+def generate(
+    *,
+    config: Any,
+    path: pathlib.Path = pathlib.Path(),
+    jobs: int = 1,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    compress: bool = False,
+) -> Dict[str, bytes]:
+    """
+    Generate the files of a config without writing them.
+
+    Args:
+        config: the config, with the same structure as a config file.
+        path: the folder to which the image references of the config are relative.
+        jobs: the number of workers used to generate the images.
+        cache: the cache of generated images.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+
+    Returns:
+        The data of each file, by its path relative to the output folder, in POSIX format.
+
+    Raises:
+        InvalidConfig: when the config isn't valid.
+        BadReference: when an image reference of the config doesn't exist.
+        WrongFileFormat: when an image of the config has an invalid format.
+    """
+    generator_config.validate_config(config=config)
+    parsed_config = generator_config.parse_config(path=path, config=config)
+    return {
+        file.path.relative_to(parsed_config["output_folder_path"]).as_posix(): bytes(file.data)
+        for file in files.generate_files(config=parsed_config, jobs=jobs, cache=cache, compress=compress)
+    }
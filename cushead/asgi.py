@@ -0,0 +1,197 @@
+"""
+Serve generated files from memory with an ASGI application.
+"""
+import base64
+import hashlib
+import mimetypes
+import posixpath
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import MutableMapping
+from typing import NamedTuple
+from typing import Tuple
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+Headers = List[Tuple[bytes, bytes]]
+
+# Content types of the generated files that the mimetypes module doesn't know, or guesses differently in each platform.
+CONTENT_TYPES = {
+    ".avif": "image/avif",
+    ".ico": "image/x-icon",
+    ".js": "text/javascript",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+    ".xml": "application/xml",
+}
+# Content type of the files without extension, like .well-known/security.
+DEFAULT_CONTENT_TYPE = "text/plain"
+# Content types that aren't text/*, but are text encoded in UTF-8.
+UTF8_CONTENT_TYPES = {"application/json", "application/xml"}
+ALLOWED_METHODS = ("GET", "HEAD")
+
+
+class Response(NamedTuple):
+    """
+    Store a response that is sent as is to each request of a file.
+    """
+
+    body: bytes
+    etag: bytes
+    headers: Headers
+
+
+def get_content_type(*, path: str) -> str:
+    """
+    Get the content type of a file.
+
+    Args:
+        path: the file path.
+
+    Returns:
+        The content type, with its charset if it's text.
+    """
+    content_type = CONTENT_TYPES.get(posixpath.splitext(path)[1]) or mimetypes.guess_type(path)[0] or DEFAULT_CONTENT_TYPE
+    if content_type.startswith("text/") or content_type in UTF8_CONTENT_TYPES:
+        return f"{content_type}; charset=utf-8"
+    return content_type
+
+
+def get_etag(*, data: bytes) -> bytes:
+    """
+    Get a strong ETag of some data, which changes when the data changes.
+
+    Args:
+        data: the data.
+
+    Returns:
+        The ETag, quoted.
+    """
+    digest = hashlib.sha256(data).digest()
+    return b'"' + base64.urlsafe_b64encode(digest).rstrip(b"=") + b'"'
+
+
+def etag_matches(*, if_none_match: bytes, etag: bytes) -> bool:
+    """
+    Check if an ETag matches an If-None-Match header.
+
+    The comparison is weak, as the header requires, so an ETag matches its weak version too.
+
+    Args:
+        if_none_match: the header value.
+        etag: the ETag.
+
+    Returns:
+        If the ETag matches.
+    """
+    for tag in if_none_match.split(b","):
+        tag = tag.strip()
+        if tag.startswith(b"W/"):
+            tag = tag[2:]
+        if tag in (b"*", etag):
+            return True
+    return False
+
+
+class Application:
+    """
+    ASGI application that serves the generated files of a config from memory.
+
+    The ETags and headers of the files are computed when the application is created, so a request only looks up its
+    response. The index is also served at the root path.
+    """
+
+    def __init__(self, *, files: Mapping[str, bytes]) -> None:
+        """
+        Initialize the application.
+
+        Args:
+            files: the data of each file, by its path relative to the output folder, as returned by cushead.api.generate.
+        """
+        self.responses: Dict[str, Response] = {}
+        for path, data in files.items():
+            etag = get_etag(data=data)
+            headers = [
+                (b"content-type", get_content_type(path=path).encode()),
+                (b"content-length", str(len(data)).encode()),
+                (b"etag", etag),
+            ]
+            self.responses[f"/{path}"] = Response(body=data, etag=etag, headers=headers)
+        if "/index.html" in self.responses:
+            self.responses["/"] = self.responses["/index.html"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle an ASGI connection.
+
+        Args:
+            scope: the connection data.
+            receive: the function that receives the messages of the client.
+            send: the function that sends messages to the client.
+        """
+        if scope["type"] == "lifespan":
+            await self.handle_lifespan(receive=receive, send=send)
+        elif scope["type"] == "http":
+            await self.handle_request(scope=scope, send=send)
+
+    @staticmethod
+    async def handle_lifespan(*, receive: Receive, send: Send) -> None:
+        """
+        Confirm the startup and the shutdown of the server, which don't require any action.
+
+        Args:
+            receive: the function that receives the messages of the server.
+            send: the function that sends messages to the server.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_request(self, *, scope: Scope, send: Send) -> None:
+        """
+        Send the response of a request.
+
+        Args:
+            scope: the request data.
+            send: the function that sends messages to the client.
+        """
+        if scope["method"] not in ALLOWED_METHODS:
+            await send_response(send=send, status=405, headers=[(b"allow", ", ".join(ALLOWED_METHODS).encode()), (b"content-length", b"0")])
+            return
+
+        response = self.responses.get(scope["path"])
+        if response is None:
+            await send_response(send=send, status=404, headers=[(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", b"9")], body=b"Not Found")
+            return
+
+        if_none_match = next((value for name, value in scope["headers"] if name == b"if-none-match"), None)
+        if if_none_match is not None and etag_matches(if_none_match=if_none_match, etag=response.etag):
+            await send_response(send=send, status=304, headers=[(b"etag", response.etag)])
+            return
+
+        await send_response(send=send, status=200, headers=response.headers, body=b"" if scope["method"] == "HEAD" else response.body)
+
+
+async def send_response(*, send: Send, status: int, headers: Headers, body: bytes = b"") -> None:
+    """
+    Send a response in a single body message.
+
+    Args:
+        send: the function that sends messages to the client.
+        status: the status code.
+        headers: the headers.
+        body: the body.
+    """
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,228 @@
+"""
+Handle the creation of archives with the generated files.
+"""
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import pathlib
+import secrets
+import stat
+import tarfile
+import zipfile
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Set
+from typing import TextIO
+from typing import Tuple
+
+from cushead import exceptions
+from cushead.console import logs
+from cushead.generator import files
+
+# The value of the --archive argument that writes the archive to the standard output, as a tar stream.
+STANDARD_OUTPUT = "-"
+# The compression of the tar archives of each extension.
+TAR_SUFFIXES = {".tar": None, ".tar.gz": "gz", ".tgz": "gz", ".tar.bz2": "bz2", ".tar.xz": "xz"}
+ZIP_SUFFIX = ".zip"
+# Modification time of the archived files, so the same files always produce the same archive. It's the minimum date of
+# the ZIP format, 1980-01-01, as a timestamp for the tar archives and as a date for the ZIP archives.
+TAR_MTIME = 315532800
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FILE_MODE = 0o644
+FOLDER_MODE = 0o755
+# Files that are already compressed, so they are stored in the ZIP archives without being compressed again.
+COMPRESSED_SUFFIXES = {".avif", ".png", ".webp"}
+
+
+def get_archive_format(*, path: str) -> Optional[str]:
+    """
+    Get the format of an archive from its path.
+
+    Args:
+        path: the archive path, or the standard output reference.
+
+    Returns:
+        The archive extension, or None if it isn't a supported archive.
+    """
+    if path == STANDARD_OUTPUT:
+        return ".tar"
+    return next((suffix for suffix in (*TAR_SUFFIXES, ZIP_SUFFIX) if path.endswith(suffix)), None)
+
+
+def get_members(*, files_to_create: Iterable[files.File], root: pathlib.Path) -> Iterator[Tuple[str, Optional[files.File]]]:
+    """
+    Get the members of an archive, in the order in which the files are generated.
+
+    Each folder is added before its first file, so the archive can be extracted as it's read.
+
+    Args:
+        files_to_create: the files to archive.
+        root: the folder to which the archived paths are relative.
+
+    Yields:
+        The name of each member, and its file, or None if it's a folder.
+    """
+    added_folders: Set[str] = set()
+    for file in files_to_create:
+        name = pathlib.Path(file.path).relative_to(root).as_posix()
+        parts = name.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            folder = "/".join(parts[:depth])
+            if folder not in added_folders:
+                added_folders.add(folder)
+                yield folder, None
+        yield name, file
+
+
+def write_tar(*, members: Iterable[Tuple[str, Optional[files.File]]], output: BinaryIO, compression: Optional[str] = None) -> Iterator[str]:
+    """
+    Write a tar archive as a stream, so it can be written to outputs that can't seek.
+
+    Args:
+        members: the archive members.
+        output: the output.
+        compression: the compression, which can be gz, bz2, xz or None.
+
+    Yields:
+        The name of each archived file, once it's written.
+    """
+    with contextlib.ExitStack() as exit_stack:
+        stream: BinaryIO = output
+        if compression == "gz":
+            # The gzip header would have the current time and the archive name otherwise.
+            stream = exit_stack.enter_context(gzip.GzipFile(filename="", mode="wb", fileobj=output, mtime=0))
+        elif compression == "bz2":
+            stream = exit_stack.enter_context(bz2.BZ2File(output, mode="wb"))
+        elif compression == "xz":
+            stream = exit_stack.enter_context(lzma.LZMAFile(output, mode="wb"))
+        archive = exit_stack.enter_context(tarfile.open(fileobj=stream, mode="w|"))
+
+        for name, file in members:
+            member = tarfile.TarInfo(name=name)
+            member.mtime = TAR_MTIME
+            if file is None:
+                member.type = tarfile.DIRTYPE
+                member.mode = FOLDER_MODE
+                archive.addfile(member)
+                continue
+            member.mode = FILE_MODE
+            member.size = len(file.data)
+            archive.addfile(member, io.BytesIO(file.data))
+            yield name
+
+
+def write_zip(*, members: Iterable[Tuple[str, Optional[files.File]]], output: BinaryIO) -> Iterator[str]:
+    """
+    Write a ZIP archive.
+
+    Args:
+        members: the archive members.
+        output: the output.
+
+    Yields:
+        The name of each archived file, once it's written.
+    """
+    with zipfile.ZipFile(output, mode="w") as archive:
+        for name, file in members:
+            if file is None:
+                member = zipfile.ZipInfo(filename=f"{name}/", date_time=ZIP_DATE_TIME)
+                # The MS-DOS directory flag, for the tools that don't read the permissions.
+                member.external_attr = (stat.S_IFDIR | FOLDER_MODE) << 16 | 0x10
+                archive.writestr(member, b"")
+                continue
+            member = zipfile.ZipInfo(filename=name, date_time=ZIP_DATE_TIME)
+            member.external_attr = (stat.S_IFREG | FILE_MODE) << 16
+            member.compress_type = zipfile.ZIP_STORED if pathlib.PurePosixPath(name).suffix in COMPRESSED_SUFFIXES else zipfile.ZIP_DEFLATED
+            archive.writestr(member, file.data)
+            yield name
+
+
+def get_archive_error(*, path: str, exception: OSError) -> exceptions.BadReference:
+    """
+    Get the error raised when an archive can't be created.
+
+    Args:
+        path: the archive path.
+        exception: the error of the archive file.
+
+    Returns:
+        The error.
+    """
+    return exceptions.BadReference(
+        "\n".join(
+            (
+                f"Can't create the archive ({path}).",
+                f"ABSOLUTE PATH: {pathlib.Path(path).absolute()}",
+                f"Exception: {exception}",
+            ),
+        ),
+    )
+
+
+def create_archive(*, files_to_create: Iterable[files.File], root: pathlib.Path, path: str, standard_output: TextIO) -> None:
+    """
+    Write the files to an archive as they are generated, without writing them to the output folder, and show the result.
+
+    The archive is the same each time that the same files are archived. It's only created, or replaced, if all the
+    files are archived.
+
+    Args:
+        files_to_create: the files to archive.
+        root: the folder to which the archived paths are relative.
+        path: the archive path, or the standard output reference.
+        standard_output: the standard output, used if the path is its reference.
+
+    Raises:
+        InvalidValue: when the archive format isn't supported.
+        BadReference: when the archive can't be created.
+    """
+    archive_format = get_archive_format(path=path)
+    if archive_format is None:
+        raise exceptions.InvalidValue(
+            f"The --archive argument must end with {', '.join(TAR_SUFFIXES)} or {ZIP_SUFFIX}, or be {STANDARD_OUTPUT} to use the standard output.",
+        )
+
+    # The archive is written to a temporary file in the same folder, which replaces the archive only if all the files
+    # are archived, so a failed build never leaves a partial archive in place of a previous one.
+    temporary_path = None if path == STANDARD_OUTPUT else pathlib.Path(path).with_name(f".{pathlib.Path(path).name}.{secrets.token_hex(4)}.tmp")
+    try:
+        with contextlib.ExitStack() as exit_stack:
+            if temporary_path is None:
+                output = standard_output.buffer
+            else:
+                try:
+                    output = exit_stack.enter_context(open(temporary_path, "xb"))
+                except OSError as exception:
+                    raise get_archive_error(path=path, exception=exception)
+
+            members = get_members(files_to_create=files_to_create, root=root)
+            if archive_format == ZIP_SUFFIX:
+                names = write_zip(members=members, output=output)
+            else:
+                names = write_tar(members=members, output=output, compression=TAR_SUFFIXES[archive_format])
+
+            print("Archived files:")
+            archived_files = 0
+            for name in names:
+                logs.show_archived_file(name=name)
+                archived_files += 1
+            output.flush()
+
+        if temporary_path is not None:
+            try:
+                os.replace(temporary_path, path)
+            except OSError as exception:
+                raise get_archive_error(path=path, exception=exception)
+    except BaseException:
+        if temporary_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temporary_path)
+        raise
+
+    destination = "the standard output" if path == STANDARD_OUTPUT else f"({path})"
+    print(f" * {archived_files} files have been archived in {destination}.")
@@ -0,0 +1,166 @@
+"""
+Handle the build of several configs in one invocation.
+"""
+from __future__ import annotations
+
+import collections
+import functools
+import pathlib
+import time
+from concurrent import futures
+from typing import Deque
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from cushead.console.arguments import config
+from cushead.console.arguments import files_creator
+from cushead.generator import cache as generator_cache
+
+# Suffix of the files that have one config per line.
+JSON_LINES_SUFFIX = ".jsonl"
+
+
+class Site(NamedTuple):
+    """
+    Store the reference to the config of a site.
+    """
+
+    path: pathlib.Path
+    line: Optional[int] = None
+    text: Optional[str] = None
+
+
+class SiteResult(NamedTuple):
+    """
+    Store the result of building the site of a config.
+    """
+
+    path: pathlib.Path
+    line: Optional[int] = None
+    created_files: int = 0
+    unchanged_files: int = 0
+    # The stale precompressed versions that have been removed.
+    removed_files: int = 0
+    errors: Tuple[files_creator.Error, ...] = ()
+    exception: Optional[str] = None
+    # The class name of the error that stopped the build.
+    exception_type: Optional[str] = None
+    duration: float = 0.0
+
+
+def get_sites(*, paths: Iterable[pathlib.Path]) -> Iterator[Site]:
+    """
+    Get the sites of several config files.
+
+    The JSON lines files are read as the sites are consumed, so they never have to fit in memory.
+
+    Args:
+        paths: the config files paths.
+
+    Yields:
+        The sites.
+    """
+    for path in paths:
+        if path.suffix == JSON_LINES_SUFFIX:
+            yield from (Site(path=path, line=line, text=text) for line, text in config.read_config_lines(path=path))
+        else:
+            yield Site(path=path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_images_cache(*, cache_dir: Optional[pathlib.Path] = None) -> generator_cache.MemoryCache:
+    """
+    Get the cache of rendered images shared by the sites built in this process.
+
+    The sites that use the same source images at the same sizes share their rendered images instead of decoding and
+    resizing them again.
+
+    Args:
+        cache_dir: a folder where to cache the rendered images between runs.
+
+    Returns:
+        The cache.
+    """
+    return generator_cache.MemoryCache(cache=generator_cache.Cache(path=cache_dir) if cache_dir is not None else None)
+
+
+def build_site(*, site: Site, cache_dir: Optional[pathlib.Path] = None, incremental: bool = False, compress: bool = False, png_profile: Optional[str] = None) -> SiteResult:
+    """
+    Build a site.
+
+    Args:
+        site: the site.
+        cache_dir: a folder where to cache the rendered images between runs.
+        incremental: if it's True, the files that already have the same data aren't written again.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+
+    Returns:
+        The result of the build. The errors that stop it are stored in the result instead of being raised, so they don't
+        stop the build of the other sites.
+    """
+    start = time.perf_counter()
+    images_cache = get_images_cache(cache_dir=cache_dir)
+    try:
+        if site.line is None or site.text is None:
+            files_to_create = config.parse_config_file(path=site.path, cache=images_cache, compress=compress, png_profile=png_profile)
+        else:
+            files_to_create = config.parse_config_line(path=site.path, line=site.line, text=site.text, cache=images_cache, compress=compress, png_profile=png_profile)
+        results = list(files_creator.write_files(files_to_create=files_to_create, incremental=incremental, compress=compress))
+    except Exception as exception:  # pylint: disable=broad-except
+        # Any error, even an unexpected one, only stops the build of its own site.
+        return SiteResult(path=site.path, line=site.line, exception=str(exception), exception_type=type(exception).__name__, duration=time.perf_counter() - start)
+
+    return SiteResult(
+        path=site.path,
+        line=site.line,
+        created_files=sum(result.written for result in results),
+        unchanged_files=sum(not result.written and not result.removed and result.error is None for result in results),
+        removed_files=sum(result.removed for result in results),
+        errors=tuple(result.error for result in results if result.error is not None),
+        duration=time.perf_counter() - start,
+    )
+
+
+def build_sites(
+    *,
+    sites: Iterable[Site],
+    jobs: int = 1,
+    cache_dir: Optional[pathlib.Path] = None,
+    incremental: bool = False,
+    compress: bool = False,
+    png_profile: Optional[str] = None,
+) -> Iterator[SiteResult]:
+    """
+    Build several sites.
+
+    With one job the sites are built one after the other in this process. With more jobs they are built in a pool of
+    processes, where each process shares its template environment and its rendered images between its sites. The sites
+    are dispatched as they are consumed, and only a few of them wait in the pool at any time.
+
+    Args:
+        sites: the sites.
+        jobs: the number of processes. Must be greater than zero.
+        cache_dir: a folder where to cache the rendered images between runs. It's shared by all the processes.
+        incremental: if it's True, the files that already have the same data aren't written again.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+
+    Yields:
+        The result of each build, in the order of the sites.
+    """
+    if jobs == 1:
+        yield from (build_site(site=site, cache_dir=cache_dir, incremental=incremental, compress=compress, png_profile=png_profile) for site in sites)
+        return
+
+    with futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending_futures: Deque[futures.Future[SiteResult]] = collections.deque()
+        for site in sites:
+            if len(pending_futures) >= jobs * 2:
+                yield pending_futures.popleft().result()
+            pending_futures.append(executor.submit(build_site, site=site, cache_dir=cache_dir, incremental=incremental, compress=compress, png_profile=png_profile))
+        while pending_futures:
+            yield pending_futures.popleft().result()
@@ -5,13 +5,17 @@ import json
 import pathlib
 from json import decoder
 from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import TypedDict
+from typing import Union
 
 from cushead import exceptions
 from cushead import info
 from cushead.console.assets import assets
-from cushead.generator import config
+from cushead.generator import cache as generator_cache
 from cushead.generator import files
 
 
@@ -51,13 +55,13 @@ def get_default_config() -> DefaultConfig:
     Returns:
         A dict with the default config.
     """
-    images = assets.get_images()
+    images_names = assets.get_images_names()
     return {
         "static_url": "/static",
-        "favicon_ico": images.favicon_ico.name,
-        "favicon_png": images.favicon_png.name,
-        "favicon_svg": images.favicon_svg.name,
-        "preview_png": images.preview_png.name,
+        "favicon_ico": images_names.favicon_ico,
+        "favicon_png": images_names.favicon_png,
+        "favicon_svg": images_names.favicon_svg,
+        "preview_png": images_names.preview_png,
         "google_tag_manager": "GTM-*******",
         "language": "en",
         "territory": "US",
@@ -120,17 +124,158 @@ def read_config_file(*, path: pathlib.Path) -> Any:
         )
 
 
-def parse_config_file(*, path: pathlib.Path) -> Tuple[files.File, ...]:
+def generate_config_files(
+    *,
+    config: Any,
+    path: pathlib.Path,
+    default_output_folder: str = "output",
+    jobs: int = 1,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    compress: bool = False,
+    png_profile: Optional[str] = None,
+) -> Iterator[files.File]:
+    """
+    Validate and parse a config.
+
+    The config is validated when this function is called, but the files are generated as they are consumed.
+
+    Args:
+        config: the config.
+        path: the folder to which the config references are relative.
+        default_output_folder: the output folder, relative to the path, used if the config doesn't set one.
+        jobs: the number of workers used to generate the images.
+        cache: the cache of generated images.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+
+    Returns:
+        The files to generate based on the config.
+    """
+    # Imported here because it imports PIL and schema, which aren't needed by the other arguments.
+    from cushead.generator import config as generator_config  # pylint: disable=import-outside-toplevel
+
+    generator_config.validate_config(config=config)
+    parsed_config = generator_config.parse_config(path=path, config=config, default_output_folder=default_output_folder)
+    if png_profile:
+        parsed_config["png_profile"] = png_profile
+    return files.generate_files(config=parsed_config, jobs=jobs, cache=cache, compress=compress)
+
+
+def parse_config_file(
+    *,
+    path: pathlib.Path,
+    jobs: int = 1,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    compress: bool = False,
+    png_profile: Optional[str] = None,
+) -> Iterator[files.File]:
     """
     Parse a config file.
 
+    The config is read and validated when this function is called, but the files are generated as they are consumed.
+
     Args:
         path: path where the config file is stored.
+        jobs: the number of workers used to generate the images.
+        cache: the cache of generated images.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
 
     Returns:
         The files to generate based on the config file.
     """
     config_file = read_config_file(path=path)
-    config.validate_config(config=config_file)
-    parsed_config = config.parse_config(path=pathlib.Path(path).parent, config=config_file)
-    return files.generate_files(config=parsed_config)
+    return generate_config_files(config=config_file, path=pathlib.Path(path).parent, jobs=jobs, cache=cache, compress=compress, png_profile=png_profile)
+
+
+def explain_config(*, config: Any) -> List[files.Dependencies]:
+    """
+    Validate a config and get the files that it generates, and the inputs from which each one is generated.
+
+    Args:
+        config: the config.
+
+    Returns:
+        The dependencies of the files.
+    """
+    # Imported here because it imports PIL and schema, which aren't needed by the other arguments.
+    from cushead.generator import config as generator_config  # pylint: disable=import-outside-toplevel
+
+    generator_config.validate_config(config=config)
+    return [dependencies for dependencies in files.get_dependency_graph().values() if files.check_conditions(conditions=dependencies.conditions, config=config)]
+
+
+def get_output_folder_path(*, path: pathlib.Path) -> pathlib.Path:
+    """
+    Get the folder where the files of a valid config file are generated.
+
+    Args:
+        path: path where the config file is stored.
+
+    Returns:
+        The output folder path.
+    """
+    # Imported here because it imports PIL and schema, which aren't needed by the other arguments.
+    from cushead.generator import config as generator_config  # pylint: disable=import-outside-toplevel
+
+    return generator_config.get_output_folder_path(path=pathlib.Path(path).parent, config=read_config_file(path=path))
+
+
+def parse_config_line(
+    *,
+    path: pathlib.Path,
+    line: int,
+    text: str,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    compress: bool = False,
+    png_profile: Optional[str] = None,
+) -> Iterator[files.File]:
+    """
+    Parse a config of a JSON lines file, which has one config per line.
+
+    If the config doesn't set an output folder, its files are generated in a folder named after its line number, inside
+    the output folder.
+
+    Args:
+        path: path where the JSON lines file is stored.
+        line: the line number, starting from 1.
+        text: the line.
+        cache: the cache of generated images.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+
+    Returns:
+        The files to generate based on the config.
+
+    Raises:
+        WrongFileFormat: when the line isn't in a valid JSON format.
+    """
+    try:
+        config_line = json.loads(text)
+    except decoder.JSONDecodeError as exception:
+        raise exceptions.WrongFileFormat(
+            "\n".join(
+                (
+                    f"Invalid json format in the line {line} of ({path})",
+                    f"ABSOLUTE PATH: {pathlib.Path(path).absolute()}",
+                    f"Exception: {exception}",
+                ),
+            ),
+        )
+    return generate_config_files(config=config_line, path=pathlib.Path(path).parent, default_output_folder=f"output/{line}", cache=cache, compress=compress, png_profile=png_profile)
+
+
+def read_config_lines(*, path: pathlib.Path) -> Iterator[Tuple[int, str]]:
+    """
+    Read the configs of a JSON lines file, one at a time, so the file never has to fit in memory.
+
+    Args:
+        path: the JSON lines file path.
+
+    Yields:
+        The line number, starting from 1, and the line of each config. The blank lines are skipped.
+    """
+    with open(path) as file:
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                yield line, text
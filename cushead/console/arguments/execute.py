@@ -2,17 +2,24 @@
 Interpret the arguments and execute the actions related to each one.
 """
 import argparse
+import itertools
 import pathlib
 import sys
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
+from typing import TextIO
 from typing import Tuple
 
 from cushead import exceptions
 from cushead.console import logs
+from cushead.console.arguments import batch
 from cushead.console.arguments import config
 from cushead.console.arguments import files_creator
 from cushead.console.arguments import setup
 from cushead.console.assets import assets
+from cushead.generator import cache as generator_cache
 from cushead.generator import files
 
 
@@ -35,39 +42,121 @@ def generate_images(*, path: pathlib.Path) -> Tuple[files.File, ...]:
     )
 
 
-def handle_args(*, parser_namespace: argparse.Namespace) -> List[files.File]:
+def handle_args(*, parser_namespace: argparse.Namespace) -> Iterator[files.File]:
     """
     Handle parser arguments.
 
+    The arguments are validated when this function is called, but the files are generated as they are consumed.
+
     Args:
         parser_namespace: the parser.
 
     Returns:
         The files to create.
     """
-    files_to_create = []
-    path = pathlib.Path(parser_namespace.FILE)
+    files_to_create: List[Iterable[files.File]] = []
+    path = pathlib.Path(parser_namespace.FILE[0])
     if parser_namespace.default:
-        files_to_create.append(config.generate_default_config_file(path=path))
+        files_to_create.append((config.generate_default_config_file(path=path),))
     if parser_namespace.images:
-        files_to_create.extend(generate_images(path=path.parent))
+        files_to_create.append(generate_images(path=path.parent))
     if parser_namespace.config:
-        files_to_create.extend(config.parse_config_file(path=path))
-    return files_to_create
+        files_to_create.append(
+            config.parse_config_file(
+                path=setup.get_config_paths(references=parser_namespace.FILE)[0],
+                jobs=parser_namespace.jobs or 1,
+                cache=generator_cache.Cache(path=pathlib.Path(parser_namespace.cache_dir)) if parser_namespace.cache_dir else None,
+                compress=parser_namespace.compress,
+                png_profile=parser_namespace.png_profile,
+            ),
+        )
+    return itertools.chain.from_iterable(files_to_create)
+
+
+def handle_batch_args(*, parser_namespace: argparse.Namespace, config_paths: List[pathlib.Path]) -> None:
+    """
+    Build the sites of several configs and show the result of each one as it's built.
+
+    Args:
+        parser_namespace: the parser.
+        config_paths: the config files paths.
 
+    Raises:
+        BuildFailure: when some of the sites can't be built.
+    """
+    results = batch.build_sites(
+        sites=batch.get_sites(paths=config_paths),
+        jobs=parser_namespace.jobs or 1,
+        cache_dir=pathlib.Path(parser_namespace.cache_dir) if parser_namespace.cache_dir else None,
+        incremental=parser_namespace.incremental,
+        compress=parser_namespace.compress,
+        png_profile=parser_namespace.png_profile,
+    )
+    sites = 0
+    failed_sites = 0
+    errors: List[files_creator.Error] = []
+
+    print("Built sites:")
+    for result in results:
+        logs.show_site_result(result=result)
+        sites += 1
+        failed_sites += result.exception is not None
+        errors.extend(result.errors)
+
+    print(f" * {sites - failed_sites} of {sites} sites have been built.")
+    logs.show_created_file_errors(errors=errors)
+    if failed_sites:
+        raise exceptions.BuildFailure(f"{failed_sites} of {sites} sites can't be built.")
 
-def parse_args(*, args: List[str]) -> None:
+
+def parse_args(*, args: List[str], standard_output: Optional[TextIO] = None) -> None:
     """
     Parse the arguments and create the corresponding files.
 
     Args:
         args: the list of arguments.
+        standard_output: the standard output where an archive can be written. The current one by default.
     """
     parser = setup.get_parser()
     try:
         parser_namespace = parser.parse_args(args=args)
         setup.validate_args(parser_namespace=parser_namespace, args=args)
-        files_to_create = handle_args(parser_namespace=parser_namespace)
-        files_creator.create_files(files_to_create=files_to_create)
+        config_paths = setup.get_config_paths(references=parser_namespace.FILE) if parser_namespace.config else []
+        if len(config_paths) > 1 or any(path.suffix == batch.JSON_LINES_SUFFIX for path in config_paths):
+            handle_batch_args(parser_namespace=parser_namespace, config_paths=config_paths)
+        elif parser_namespace.explain:
+            config_file = config.read_config_file(path=config_paths[0])
+            logs.show_dependencies(dependencies=config.explain_config(config=config_file), config=config_file)
+        elif parser_namespace.archive is not None:
+            # Imported here because the archive modules aren't needed by the other arguments.
+            from cushead.console.arguments import archive  # pylint: disable=import-outside-toplevel
+
+            files_to_create = handle_args(parser_namespace=parser_namespace)
+            archive.create_archive(
+                files_to_create=files_to_create,
+                root=config.get_output_folder_path(path=config_paths[0]),
+                path=parser_namespace.archive,
+                standard_output=standard_output or sys.stdout,
+            )
+        elif parser_namespace.watch:
+            # Imported here because it imports PIL and schema, which aren't needed by the other arguments.
+            from cushead.console.arguments import watch  # pylint: disable=import-outside-toplevel
+
+            watch.watch(
+                path=config_paths[0],
+                jobs=parser_namespace.jobs or 1,
+                cache_dir=pathlib.Path(parser_namespace.cache_dir) if parser_namespace.cache_dir else None,
+                incremental=parser_namespace.incremental,
+                compress=parser_namespace.compress,
+                png_profile=parser_namespace.png_profile,
+            )
+        else:
+            files_to_create = handle_args(parser_namespace=parser_namespace)
+            files_creator.create_files(
+                files_to_create=files_to_create,
+                incremental=parser_namespace.incremental,
+                jobs=parser_namespace.jobs or 1,
+                compress=parser_namespace.compress,
+            )
     except (KeyboardInterrupt, exceptions.MainException) as exception:
         sys.exit(logs.get_exception_message(parser=parser, message=str(exception)))
@@ -3,14 +3,22 @@ Handle the files creation.
 """
 from __future__ import annotations
 
+import contextlib
+import os
 import pathlib
-from typing import Dict
+import secrets
+import stat
+from concurrent import futures
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import NamedTuple
 from typing import Optional
-from typing import Tuple
+from typing import Set
+from typing import Union
 
 from cushead.console import logs
+from cushead.generator import compression
 from cushead.generator import files
 
 
@@ -23,113 +31,184 @@ class Error(NamedTuple):
     path: pathlib.Path
 
 
-class Node:
+def has_same_data(*, path: pathlib.Path, data: Union[bytes, memoryview]) -> bool:
     """
-    Represent a node.
+    Check if a file exists and already has some data.
 
-    Can have child nodes and own data.
-    """
-
-    def __init__(self, *, name: str, data: Optional[bytes] = None) -> None:
-        """
-        Create a node.
-
-        Args:
-            name: the name.
-            data: the data.
-        """
-        self.name = name
-        self.data = data
-        self.childrens: Dict[str, Node] = {}
-
-    def add_child(self, *, parts: Tuple[str, ...], data: bytes) -> None:
-        """
-        Add children node.
-
-        To add a child node, you must define its path within the current node. Each part of the path represents a node.
-        The path is interpreted as follows: the first part represents a child node of the current node, the second part
-        represents a child node of the first node.
-        The last part is the node to be added, it is to which the defined data will be added. If any of the nodes in
-        the path does not exist, it will be created.
-
-        Args:
-            parts: path of the child in the node.
-            data: child data.
-        """
-        if len(parts) > 1:
-            if parts[0] not in self.childrens:
-                self.childrens[parts[0]] = Node(name=parts[0])
-            self.childrens[parts[0]].add_child(parts=parts[1:], data=data)
-        else:
-            self.childrens[parts[0]] = Node(name=parts[0], data=data)
+    The type and size of the file are checked first, so the files with a different size are never read. The content is
+    compared by chunks, and the reading stops at the first difference.
 
+    Args:
+        path: the file path.
+        data: the data.
 
-def create_node(*, node_items: List[files.File]) -> Node:
+    Returns:
+        If the file has the same data.
+    """
+    try:
+        file_stat = path.stat()
+    except OSError:
+        return False
+    if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size != len(data):
+        return False
+
+    chunk_size = 1024 * 1024
+    data_view = memoryview(data)
+    try:
+        with open(path, "rb") as file:
+            for position in range(0, len(data), chunk_size):
+                if file.read(chunk_size) != data_view[position : position + chunk_size]:
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+def create_file(*, file: files.File, incremental: bool = False) -> bool:
     """
-    Create a node structure based on a list of files to create.
+    Write a file atomically.
+
+    The data is written to a temporary file in the same folder, which then replaces the file, so the file never has
+    partial data, even if the writing fails.
 
     Args:
-        node_items: a list that have info about the files to create.
+        file: the file to create. Its parent folder must exist.
+        incremental: if it's True, the file isn't written again if it already has the same data.
 
     Returns:
-        A node tree.
+        If the file has been written.
+
+    Raises:
+        OSError: when the file can't be written.
+    """
+    destination_path = pathlib.Path(file.path)
+    if incremental and has_same_data(path=destination_path, data=file.data):
+        return False
+
+    temporary_path = destination_path.with_name(f".{destination_path.name}.{secrets.token_hex(4)}.tmp")
+    try:
+        with open(temporary_path, "xb") as temporary_file:
+            temporary_file.write(file.data)
+        os.replace(temporary_path, destination_path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temporary_path)
+        raise
+    return True
+
+
+class WriteResult(NamedTuple):
+    """
+    Store the result of writing a file.
     """
-    base_path = Node(name="")
-    for file in node_items:
-        base_path.add_child(parts=pathlib.Path(file.path).parts, data=file.data)
-    return base_path
+
+    path: pathlib.Path
+    written: bool
+    error: Optional[Error] = None
+    # If the file has been removed instead of written.
+    removed: bool = False
 
 
-def parse_node(*, node: Node, base_path: pathlib.Path) -> Tuple[bool, List[Error]]:
+def remove_stale_versions(*, paths: List[pathlib.Path]) -> Iterator[WriteResult]:
     """
-    Create a representation of a node in the system directory.
+    Remove the precompressed versions of the text files that haven't been generated.
+
+    A version isn't generated when it isn't smaller than its file, so the one written by a previous build would be
+    served in place of the new file otherwise.
 
     Args:
-        node: the node.
-        base_path: the base path where the files will be created.
+        paths: the paths of the generated files, including their precompressed versions.
 
-    Returns:
-        If at least one file has been created.
-        Files with errors.
+    Yields:
+        The result of removing each version that existed.
     """
-    errors = []
-    file_has_been_created = False
-
-    for name, subnode in sorted(node.childrens.items()):
-        destination_path = base_path / name
-
-        # Create children node.
-        if subnode.data:
+    generated_paths = set(paths)
+    for path in paths:
+        if not compression.is_compressible(path=path):
+            continue
+        for version_path in compression.get_version_paths(path=path):
+            if version_path in generated_paths:
+                continue
             try:
-                destination_path.write_bytes(subnode.data or bytes())
+                os.remove(version_path)
+            except FileNotFoundError:
+                continue
             except OSError as exception:
-                errors.append(Error(error=str(exception.__class__.__name__), path=destination_path))
-            else:
-                file_has_been_created = True
-                logs.show_created_file(path=destination_path)
+                yield WriteResult(path=version_path, written=False, error=Error(error=str(exception.__class__.__name__), path=version_path))
+                continue
+            yield WriteResult(path=version_path, written=False, removed=True)
+
+
+def write_files(*, files_to_create: Iterable[files.File], incremental: bool = False, jobs: int = 1, compress: bool = False) -> Iterator[WriteResult]:
+    """
+    Write files based on an iterable, using a pool of workers if more than one job is requested.
 
-        # Create parent node.
+    Each file is written as soon as it's generated, so it can be released before the next one is generated. Each parent
+    folder is created once, before its first file is written.
+
+    Args:
+        files_to_create: an iterable that have info about the files to create.
+        incremental: if it's True, the files that already have the same data aren't written again.
+        jobs: the number of workers.
+        compress: if it's True, the precompressed versions of the text files that haven't been generated are removed.
+
+    Yields:
+        The result of writing each file, in the order of the files, and then the result of removing each stale
+        precompressed version.
+    """
+    created_folders: Set[pathlib.Path] = set()
+
+    def write_file(file: files.File) -> WriteResult:
+        path = pathlib.Path(file.path)
+        try:
+            if path.parent not in created_folders:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                created_folders.update((path.parent, *path.parent.parents))
+            written = create_file(file=file, incremental=incremental)
+        except OSError as exception:
+            return WriteResult(path=path, written=False, error=Error(error=str(exception.__class__.__name__), path=path))
+        return WriteResult(path=path, written=written)
+
+    paths: List[pathlib.Path] = []
+    with contextlib.ExitStack() as exit_stack:
+        if jobs == 1:
+            results: Iterator[WriteResult] = map(write_file, files_to_create)
         else:
-            if not destination_path.exists():
-                destination_path.mkdir()
-            sub_node_created_files, sub_node_errors = parse_node(node=subnode, base_path=destination_path)
-            file_has_been_created = file_has_been_created or sub_node_created_files
-            errors.extend(sub_node_errors)
+            executor = exit_stack.enter_context(futures.ThreadPoolExecutor(max_workers=jobs))
+            results = files.map_lazily(executor=executor, function=write_file, items=files_to_create, window=jobs * 2)
+        for result in results:
+            paths.append(result.path)
+            yield result
 
-    return file_has_been_created, errors
+    if compress:
+        yield from remove_stale_versions(paths=paths)
 
 
-def create_files(*, files_to_create: List[files.File]) -> None:
+def create_files(*, files_to_create: Iterable[files.File], incremental: bool = False, jobs: int = 1, compress: bool = False) -> None:
     """
-    Create files based on a list.
+    Create files based on an iterable and show the result.
 
     Args:
-        files_to_create: a list that have info about the elements to create inside the node.
+        files_to_create: an iterable that have info about the files to create.
+        incremental: if it's True, the files that already have the same data aren't written again.
+        jobs: the number of workers used to write the files.
+        compress: if it's True, the precompressed versions of the text files that haven't been generated are removed.
     """
-    node = create_node(node_items=files_to_create)
+    errors: List[Error] = []
+    file_has_been_created = False
 
     print("Created files:")
-    created_files, errors = parse_node(node=node, base_path=pathlib.Path(""))
-    if not created_files:
+    for result in write_files(files_to_create=files_to_create, incremental=incremental, jobs=jobs, compress=compress):
+        if result.error is not None:
+            errors.append(result.error)
+        elif result.removed:
+            logs.show_removed_file(path=result.path)
+        elif result.written:
+            file_has_been_created = True
+            logs.show_created_file(path=result.path)
+        else:
+            logs.show_unchanged_file(path=result.path)
+
+    if not file_has_been_created:
         print(" * No one file has been created.")
     logs.show_created_file_errors(errors=errors)
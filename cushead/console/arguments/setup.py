@@ -2,6 +2,7 @@
 Handle the argparse related features.
 """
 import argparse
+import glob
 import pathlib
 from typing import List
 
@@ -20,7 +21,10 @@ def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog=info.PACKAGE_NAME,
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        usage=f"{info.PACKAGE_NAME} {{ --help | {{ --config | --default [ --images ] }} FILE }}",
+        usage=(
+            f"{info.PACKAGE_NAME} {{ --help | --config [ --jobs N ] [ --cache-dir DIR ] [ --incremental ] [ --compress ] [ --png-profile PROFILE ] "
+            "[ --watch | --explain | --archive ARCHIVE ] FILE... | --default [ --images ] [ --incremental ] FILE }"
+        ),
         allow_abbrev=False,
         add_help=False,
         epilog="\n".join(
@@ -30,6 +34,18 @@ def get_parser() -> argparse.ArgumentParser:
                 f"  {info.PACKAGE_NAME} --default --images config.json",
                 "2) Run that config:",
                 f"  {info.PACKAGE_NAME} --config config.json",
+                "3) Run the configs of several sites in parallel:",
+                f"  {info.PACKAGE_NAME} --config --jobs 4 'sites/*/config.json'",
+                "4) Rebuild a config while it or its images are edited:",
+                f"  {info.PACKAGE_NAME} --config --watch config.json",
+                "5) Show the inputs from which each file of a config is generated:",
+                f"  {info.PACKAGE_NAME} --config --explain config.json",
+                "6) Pack the files of a config in an archive:",
+                f"  {info.PACKAGE_NAME} --config --archive site.tar.gz config.json",
+                "7) Also generate the gzip and brotli versions of the text files, for servers that serve them directly:",
+                f"  {info.PACKAGE_NAME} --config --compress config.json",
+                "8) Encode the images as small as possible, for a release build:",
+                f"  {info.PACKAGE_NAME} --config --png-profile smallest config.json",
             ),
         ),
     )
@@ -50,7 +66,7 @@ def get_parser() -> argparse.ArgumentParser:
         dest="config",
         action="store_true",
         default=False,
-        help="Read a config file and create the website template based on it.",
+        help="Read config files and create the website templates based on them.",
     )
     excluding_arguments.add_argument(
         "-d",
@@ -61,7 +77,7 @@ def get_parser() -> argparse.ArgumentParser:
         help="Generate a default config. Can be used with --images.",
     )
 
-    images = assets.get_images()
+    images_names = assets.get_images_names()
     optional_arguments.add_argument(
         "-i",
         "--images",
@@ -70,16 +86,103 @@ def get_parser() -> argparse.ArgumentParser:
         default=False,
         help=(
             "Use with --default. Generate default images that can be used by the default config file. "
-            f"This include: {images.favicon_ico.name}, {images.favicon_png.name}, {images.favicon_svg.name} and {images.preview_png.name}"
+            f"This include: {images_names.favicon_ico}, {images_names.favicon_png}, {images_names.favicon_svg} and {images_names.preview_png}"
+        ),
+    )
+
+    optional_arguments.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        metavar="N",
+        default=None,
+        help=(
+            "Use with --config. Number of workers used to resize, encode and write the images in parallel, "
+            "or to build the sites in parallel processes when there are several config files. Defaults to 1."
+        ),
+    )
+    optional_arguments.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        metavar="DIR",
+        default=None,
+        help=(
+            "Use with --config. Folder where to cache the generated images between runs. "
+            "The images are regenerated only when their source, size or settings change."
+        ),
+    )
+
+    optional_arguments.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        default=False,
+        help="Don't write again the files that already exist with the same content, so their modification time is kept.",
+    )
+    optional_arguments.add_argument(
+        "--compress",
+        dest="compress",
+        action="store_true",
+        default=False,
+        help=(
+            "Use with --config. Also generate a .gz version of each text file, and a .br version if the brotli module is installed, "
+            "at the maximum compression. The versions that aren't smaller than their file are skipped."
+        ),
+    )
+    optional_arguments.add_argument(
+        "--png-profile",
+        dest="png_profile",
+        choices=("fast", "balanced", "smallest"),
+        metavar="PROFILE",
+        default=None,
+        help=(
+            "Use with --config. Profile of the PNG encoder, which overrides the png_profile key of the config. "
+            "It can be fast, which barely compresses the images, balanced, which is the default, "
+            "or smallest, which compresses them as much as possible. "
+            "The icons with 256 colors or fewer are also encoded with a palette, which is kept if it's smaller, and smallest tries it with all the images."
+        ),
+    )
+    optional_arguments.add_argument(
+        "--archive",
+        dest="archive",
+        metavar="ARCHIVE",
+        default=None,
+        help=(
+            "Use with --config. Write the files to an archive instead of the output folder. "
+            "It can be a .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz or .zip file, or - to write a tar archive to the standard output. "
+            "The paths are relative to the output folder, and the same files always produce the same archive."
+        ),
+    )
+    optional_arguments.add_argument(
+        "--watch",
+        dest="watch",
+        action="store_true",
+        default=False,
+        help=(
+            "Use with --config. Keep running and rebuild the config each time it or its images change. "
+            "Only the files that depend on the changes are generated again."
+        ),
+    )
+    optional_arguments.add_argument(
+        "--explain",
+        dest="explain",
+        action="store_true",
+        default=False,
+        help=(
+            "Use with --config. Show the files that the config generates, and the config keys and images from which each one is generated, "
+            "without generating them."
         ),
     )
 
     positional_arguments.add_argument(
         "FILE",
-        nargs="?",
+        nargs="*",
         help=(
             "Input or output file used by the --config or --default arguments. "
             "For --config it must be a path to a config file in JSON format. "
+            "Several files, folders with config files or glob patterns can be used to build several sites at once. "
+            "A file with the .jsonl extension can have one config per line, and each one is built in output/LINE unless it sets output_folder. "
             "For --default it must be the destination path where to want to create the default config. "
             "If the --images argument is set, the images would be created in the directory of that file."
         ),
@@ -99,6 +202,7 @@ def validate_args(*, parser_namespace: argparse.Namespace, args: List[str]) -> N
     Raises:
         MissRequired: when missing a required argument.
         InvalidCombination: when the combinations of arguments are invalid.
+        InvalidValue: when an argument has an invalid value.
         BadReference: when the arguments reference an invalid file.
     """
     if not (parser_namespace.config or parser_namespace.default):
@@ -113,28 +217,136 @@ def validate_args(*, parser_namespace: argparse.Namespace, args: List[str]) -> N
         images_arg = "-i" if "-i" in args else "--images"
         raise exceptions.InvalidCombination(f"Can't use {images_arg} argument without --default.")
 
+    if parser_namespace.jobs is not None:
+        jobs_arg = "-j" if "-j" in args else "--jobs"
+        if not parser_namespace.config:
+            raise exceptions.InvalidCombination(f"Can't use {jobs_arg} argument without --config.")
+        if parser_namespace.jobs < 1:
+            raise exceptions.InvalidValue(f"The {jobs_arg} argument must be greater than zero.")
+
+    if parser_namespace.cache_dir is not None and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --cache-dir argument without --config.")
+
+    if parser_namespace.compress and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --compress argument without --config.")
+
+    if parser_namespace.png_profile is not None and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --png-profile argument without --config.")
+
+    if parser_namespace.watch and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --watch argument without --config.")
+
+    if parser_namespace.explain and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --explain argument without --config.")
+
+    if parser_namespace.archive is not None and not parser_namespace.config:
+        raise exceptions.InvalidCombination("Can't use --archive argument without --config.")
+
+    if parser_namespace.watch and parser_namespace.explain:
+        raise exceptions.InvalidCombination("Can't use --watch and --explain arguments together.")
+
+    if parser_namespace.archive is not None:
+        for other_arg in ("incremental", "watch", "explain"):
+            if getattr(parser_namespace, other_arg):
+                raise exceptions.InvalidCombination(f"Can't use --archive and --{other_arg} arguments together.")
+
     if not parser_namespace.FILE:
         if parser_namespace.config:
             raise exceptions.MissRequired("The path to the config file is missing.")
         raise exceptions.MissRequired("The destination path for the default config file is missing.")
 
+    if parser_namespace.default and len(parser_namespace.FILE) > 1:
+        default_arg = "-d" if "-d" in args else "--default"
+        raise exceptions.InvalidCombination(f"Can't use more than one FILE with {default_arg}.")
+
     if parser_namespace.config:
-        reference = pathlib.Path(parser_namespace.FILE)
-        if not reference.exists():
+        config_paths = get_config_paths(references=parser_namespace.FILE)
+        if len(config_paths) > 1 or config_paths[0].suffix == ".jsonl":
+            for single_config_arg in ("watch", "explain", "archive"):
+                if getattr(parser_namespace, single_config_arg):
+                    raise exceptions.InvalidCombination(f"Can't use --{single_config_arg} argument with several configs.")
+
+    if parser_namespace.cache_dir:
+        cache_dir = pathlib.Path(parser_namespace.cache_dir)
+        if cache_dir.exists() and not cache_dir.is_dir():
+            raise exceptions.BadReference(
+                "\n".join(
+                    (
+                        f"The cache folder ({cache_dir}) must be a reference to a directory.",
+                        f"ABSOLUTE PATH: {cache_dir.absolute()}",
+                    ),
+                ),
+            )
+
+
+def writes_to_standard_output(*, args: List[str]) -> bool:
+    """
+    Check if the arguments write an archive to the standard output, which can't be mixed with the messages.
+
+    Args:
+        args: the list of arguments.
+
+    Returns:
+        If the archive is written to the standard output.
+    """
+    return "--archive=-" in args or any(arg == "--archive" and next_arg == "-" for arg, next_arg in zip(args, args[1:]))
+
+
+def get_config_paths(*, references: List[str]) -> List[pathlib.Path]:
+    """
+    Get the config files referenced by the FILE arguments.
+
+    A reference can be a config file, a folder, whose JSON and JSON lines files are used, or a glob pattern.
+
+    Args:
+        references: the references.
+
+    Returns:
+        The config files paths, without duplicates.
+
+    Raises:
+        BadReference: when a reference doesn't lead to config files.
+    """
+    paths: List[pathlib.Path] = []
+    for reference in references:
+        reference_path = pathlib.Path(reference)
+        if reference_path.is_dir():
+            folder_paths = sorted(path for path in reference_path.iterdir() if path.suffix in (".json", ".jsonl") and path.is_file())
+            if not folder_paths:
+                raise exceptions.BadReference(
+                    "\n".join(
+                        (
+                            f"The folder ({reference_path}) doesn't have config files.",
+                            f"ABSOLUTE PATH: {reference_path.absolute()}",
+                        ),
+                    ),
+                )
+            paths.extend(folder_paths)
+        elif not reference_path.exists() and glob.has_magic(reference):
+            pattern_paths = sorted(pathlib.Path(path) for path in glob.glob(reference, recursive=True))
+            if not pattern_paths:
+                raise exceptions.BadReference(f"The pattern ({reference}) doesn't match any file.")
+            paths.extend(pattern_paths)
+        else:
+            paths.append(reference_path)
+
+    for path in paths:
+        if not path.exists():
             raise exceptions.BadReference(
                 "\n".join(
                     (
-                        f"The file ({reference}) must be a reference to a path that exists.",
-                        f"ABSOLUTE PATH: {reference.absolute()}",
+                        f"The file ({path}) must be a reference to a path that exists.",
+                        f"ABSOLUTE PATH: {path.absolute()}",
                     ),
                 ),
             )
-        if not reference.is_file():
+        if not path.is_file():
             raise exceptions.BadReference(
                 "\n".join(
                     (
-                        f"The file ({reference}) must be a reference to a file.",
-                        f"ABSOLUTE PATH: {reference.absolute()}",
+                        f"The file ({path}) must be a reference to a file.",
+                        f"ABSOLUTE PATH: {path.absolute()}",
                     ),
                 ),
             )
+    return list(dict.fromkeys(paths))
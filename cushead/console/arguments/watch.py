@@ -0,0 +1,195 @@
+"""
+Handle the watch mode, which rebuilds the files of a config when the config or its images change.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import time
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from cushead import exceptions
+from cushead.console import logs
+from cushead.console.arguments import config
+from cushead.console.arguments import files_creator
+from cushead.generator import cache as generator_cache
+from cushead.generator import config as generator_config
+from cushead.generator import files
+from cushead.generator import images
+
+# Seconds between two checks of the watched files.
+WATCH_INTERVAL = 0.25
+
+
+class Changes(NamedTuple):
+    """
+    Store the inputs of a config that changed since the last build.
+    """
+
+    keys: Set[str]
+    sources: Set[str]
+
+
+def get_file_stat(*, path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    """
+    Get the data of a file that changes when the file is modified or replaced.
+
+    Args:
+        path: the file path.
+
+    Returns:
+        The modification time and the size, or None if the file doesn't exist.
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+class Watcher:
+    """
+    Build a config and rebuild the files affected by each change of the config or of its source images.
+
+    The decoded images, the rendered images and the template environment are kept between builds, so a rebuild only
+    pays for the files that changed.
+    """
+
+    def __init__(self, *, path: pathlib.Path, jobs: int = 1, cache_dir: Optional[pathlib.Path] = None, compress: bool = False, png_profile: Optional[str] = None) -> None:
+        """
+        Initialize a watcher.
+
+        Args:
+            path: the config file path.
+            jobs: the number of workers used to generate the images.
+            cache_dir: a folder where to cache the generated images between runs.
+            compress: if it's True, the precompressed versions of the text files are also generated.
+            png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+        """
+        self.path = path
+        self.jobs = jobs
+        self.compress = compress
+        self.png_profile = png_profile
+        self.cache = generator_cache.MemoryCache(cache=generator_cache.Cache(path=cache_dir) if cache_dir is not None else None)
+        self.config: Dict[str, Any] = {}
+        self.parsed_config: Optional[generator_config.Config] = None
+        self.config_stat: Optional[Tuple[int, int]] = None
+        self.sources_stats: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    def get_sources_stats(self, *, config_data: Dict[str, Any]) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        Get the data that changes when the source images of a config are modified or replaced.
+
+        Args:
+            config_data: the config.
+
+        Returns:
+            The data of each source image, by its config key.
+        """
+        return {source: get_file_stat(path=self.path.parent / config_data[source]) for source in images.SOURCES_KEYS if config_data.get(source)}
+
+    def get_changes(self) -> Optional[Changes]:
+        """
+        Get the inputs that changed since the last build.
+
+        Returns:
+            The changes, or None if nothing changed.
+
+        Raises:
+            InvalidConfig: when the config isn't valid.
+            WrongFileFormat: when the config file isn't in a valid JSON format.
+        """
+        config_stat = get_file_stat(path=self.path)
+        config_data = self.config
+        if config_stat != self.config_stat:
+            self.config_stat = config_stat
+            config_data = config.read_config_file(path=self.path)
+            generator_config.validate_config(config=config_data)
+
+        sources_stats = self.get_sources_stats(config_data=config_data)
+        changes = Changes(
+            keys={key for key in config_data.keys() | self.config.keys() if config_data.get(key) != self.config.get(key)},
+            sources={source for source, source_stat in sources_stats.items() if source_stat != self.sources_stats.get(source)},
+        )
+        if not (changes.keys or changes.sources):
+            return None
+        self.config = config_data
+        self.sources_stats = sources_stats
+        return changes
+
+    def build(self, *, changes: Changes, incremental: bool = True) -> None:
+        """
+        Generate the files affected by some changes.
+
+        The first build generates all the files.
+
+        Args:
+            changes: the changes.
+            incremental: if it's True, the files that already have the same data aren't written again.
+        """
+        parsed_config = generator_config.parse_config(path=self.path.parent, config=self.config)
+        if self.png_profile:
+            parsed_config["png_profile"] = self.png_profile
+        paths = None
+        if self.parsed_config is not None:
+            # Keep the source images that didn't change, which are already decoded.
+            for source in set(images.SOURCES_KEYS) - changes.sources - changes.keys:
+                parsed_config[source] = self.parsed_config[source]
+            paths = files.get_affected_files(keys=changes.keys, sources=changes.sources)
+        self.parsed_config = parsed_config
+
+        files_to_create = files.generate_files(config=parsed_config, jobs=self.jobs, cache=self.cache, paths=paths, compress=self.compress)
+        files_creator.create_files(files_to_create=files_to_create, incremental=incremental, jobs=self.jobs, compress=self.compress)
+
+    def rebuild(self) -> bool:
+        """
+        Generate the files affected by the changes since the last build, if there are any.
+
+        The errors are shown instead of being raised, so the watch continues until they are fixed.
+
+        Returns:
+            If there were changes.
+        """
+        start = time.perf_counter()
+        try:
+            changes = self.get_changes()
+            if changes is None:
+                return False
+            logs.show_changes(keys=changes.keys, sources=changes.sources)
+            self.build(changes=changes)
+        except exceptions.MainException as exception:
+            logs.show_watch_error(message=str(exception))
+            return True
+        logs.show_rebuild_time(duration=time.perf_counter() - start)
+        return True
+
+
+def watch(*, path: pathlib.Path, jobs: int = 1, cache_dir: Optional[pathlib.Path] = None, incremental: bool = False, compress: bool = False, png_profile: Optional[str] = None) -> None:
+    """
+    Build a config and rebuild it on each change until the user stops it.
+
+    Args:
+        path: the config file path.
+        jobs: the number of workers used to generate the images.
+        cache_dir: a folder where to cache the generated images between runs.
+        incremental: if it's True, the files that already have the same data aren't written again in the first build.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+        png_profile: the name of the PNG encoder profile, which overrides the one of the config.
+    """
+    watcher = Watcher(path=path, jobs=jobs, cache_dir=cache_dir, compress=compress, png_profile=png_profile)
+    changes = watcher.get_changes()
+    if changes is not None:
+        watcher.build(changes=changes, incremental=incremental)
+
+    print(f"\nWatching {path} and its images. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            watcher.rebuild()
+    except KeyboardInterrupt:
+        return
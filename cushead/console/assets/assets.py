@@ -1,6 +1,8 @@
 """
 Get assets files.
 """
+import functools
+import mmap
 import pathlib
 from typing import NamedTuple
 
@@ -11,7 +13,18 @@ class Image(NamedTuple):
     """
 
     name: str
-    data: bytes
+    data: memoryview
+
+
+class AssetsNames(NamedTuple):
+    """
+    Store the assets images names.
+    """
+
+    favicon_ico: str
+    favicon_png: str
+    favicon_svg: str
+    preview_png: str
 
 
 class Assets(NamedTuple):
@@ -25,6 +38,40 @@ class Assets(NamedTuple):
     preview_png: Image
 
 
+def get_images_names() -> AssetsNames:
+    """
+    Get the assets images names, without reading the images.
+
+    Returns:
+        A tuple of the images names.
+    """
+    return AssetsNames(
+        favicon_ico="favicon_ico_16px.ico",
+        favicon_png="favicon_png_2688px.png",
+        favicon_svg="favicon_svg_scalable.svg",
+        preview_png="preview_png_600px.png",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_image(*, name: str) -> Image:
+    """
+    Get an assets image.
+
+    The file is memory-mapped the first time it's requested and kept mapped for the rest of the process, so its bytes
+    are read from the disk only when they are used, and they are copied only when they are written to another file.
+
+    Args:
+        name: the image name.
+
+    Returns:
+        The image.
+    """
+    with open(pathlib.Path(__file__).parent / "images" / name, "rb") as file:
+        # The map remains valid after the file is closed.
+        return Image(name, memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)))
+
+
 def get_images() -> Assets:
     """
     Get the assets images.
@@ -32,10 +79,4 @@ def get_images() -> Assets:
     Returns:
         A tuple of the images.
     """
-    assets_folder = pathlib.Path(__file__).parent / "images"
-    return Assets(
-        Image("favicon_ico_16px.ico", (assets_folder / "favicon_ico_16px.ico").read_bytes()),
-        Image("favicon_png_2688px.png", (assets_folder / "favicon_png_2688px.png").read_bytes()),
-        Image("favicon_svg_scalable.svg", (assets_folder / "favicon_svg_scalable.svg").read_bytes()),
-        Image("preview_png_600px.png", (assets_folder / "preview_png_600px.png").read_bytes()),
-    )
+    return Assets(*(get_image(name=name) for name in get_images_names()))
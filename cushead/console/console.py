@@ -2,11 +2,13 @@
 """
 Run the CLI functionality.
 """
+import contextlib
 import sys
 from typing import List
 
 from cushead.console import logs
 from cushead.console.arguments import execute
+from cushead.console.arguments import setup
 
 
 def init(*, args: List[str]) -> None:
@@ -16,8 +18,11 @@ def init(*, args: List[str]) -> None:
     Args:
         args: list of arguments.
     """
-    logs.show_presentation()
-    execute.parse_args(args=args)
+    standard_output = sys.stdout
+    # The messages are shown in the standard error when an archive is written to the standard output, so they don't mix.
+    with contextlib.redirect_stdout(sys.stderr) if setup.writes_to_standard_output(args=args) else contextlib.nullcontext():
+        logs.show_presentation()
+        execute.parse_args(args=args, standard_output=standard_output)
 
 
 def main() -> None:
@@ -1,15 +1,22 @@
 """
 Execute custom print messages.
 """
+from __future__ import annotations
+
 import argparse
 import pathlib
 import textwrap
+from typing import Any
+from typing import Iterable
 from typing import List
+from typing import Mapping
 
 import colorama
 
 from cushead import info
+from cushead.console.arguments import batch
 from cushead.console.arguments import files_creator
+from cushead.generator import files
 
 
 def show_presentation() -> None:
@@ -70,6 +77,27 @@ def show_created_file(path: pathlib.Path) -> None:
     print(f" - {path.parent}/{colorama.Fore.YELLOW}{path}{colorama.Fore.RESET}")
 
 
+def show_unchanged_file(path: pathlib.Path) -> None:
+    """
+    Print an unchanged file message.
+    """
+    print(f" - {path.parent}/{colorama.Fore.YELLOW}{path}{colorama.Fore.RESET} (unchanged)")
+
+
+def show_removed_file(path: pathlib.Path) -> None:
+    """
+    Print a removed file message.
+    """
+    print(f" - {path.parent}/{colorama.Fore.YELLOW}{path}{colorama.Fore.RESET} (removed)")
+
+
+def show_archived_file(*, name: str) -> None:
+    """
+    Print an archived file message.
+    """
+    print(f" - {colorama.Fore.YELLOW}{name}{colorama.Fore.RESET}")
+
+
 def show_created_file_errors(errors: List[files_creator.Error]) -> None:
     """
     Print error messages for the files with errors at creation time.
@@ -80,3 +108,52 @@ def show_created_file_errors(errors: List[files_creator.Error]) -> None:
     print("\nErrors:")
     for error in errors:
         print(f" - {colorama.Fore.RED}{error.error}{colorama.Fore.RESET}: {error.path.parent}/{colorama.Fore.YELLOW}{error.path}{colorama.Fore.RESET}")
+
+
+def show_site_result(result: batch.SiteResult) -> None:
+    """
+    Print the result of building a site.
+    """
+    location = f"{result.path}:{result.line}" if result.line is not None else f"{result.path}"
+    if result.exception is not None:
+        print(f" - {colorama.Fore.YELLOW}{location}{colorama.Fore.RESET}: {colorama.Fore.RED}failed with {result.exception_type}{colorama.Fore.RESET}")
+        print(textwrap.indent(result.exception, "   "))
+        return
+    print(
+        f" - {colorama.Fore.YELLOW}{location}{colorama.Fore.RESET}: "
+        f"{result.created_files} created, {result.unchanged_files} unchanged, {result.removed_files} removed, {len(result.errors)} errors in {result.duration:.2f}s"
+    )
+
+
+def show_changes(*, keys: Iterable[str], sources: Iterable[str]) -> None:
+    """
+    Print the inputs of a config that changed.
+    """
+    changes = [*(f"{key} key" for key in sorted(keys)), *(f"{source} image" for source in sorted(sources))]
+    print(f"\nChanged: {colorama.Fore.YELLOW}{', '.join(changes)}{colorama.Fore.RESET}")
+
+
+def show_watch_error(*, message: str) -> None:
+    """
+    Print an error that doesn't stop the watch mode.
+    """
+    print(f"\n{colorama.Fore.RED}Error{colorama.Fore.RESET}: {message}")
+
+
+def show_rebuild_time(*, duration: float) -> None:
+    """
+    Print the time that took a rebuild.
+    """
+    print(f" * Rebuilt in {duration * 1000:.0f}ms.")
+
+
+def show_dependencies(*, dependencies: Iterable[files.Dependencies], config: Mapping[str, Any]) -> None:
+    """
+    Print the files that a config generates and the inputs from which each one is generated.
+    """
+    print("Generated files:")
+    for file_dependencies in dependencies:
+        print(f" - {colorama.Fore.YELLOW}{file_dependencies.path}{colorama.Fore.RESET}")
+        print(f"   keys: {', '.join(sorted(file_dependencies.keys))}")
+        if file_dependencies.sources:
+            print(f"   images: {', '.join(f'{source} ({config[source]})' for source in sorted(file_dependencies.sources))}")
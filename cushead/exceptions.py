@@ -27,6 +27,12 @@ class BadReference(MainException):
     """
 
 
+class InvalidValue(MainException):
+    """
+    When a value is invalid.
+    """
+
+
 class InvalidConfig(MainException):
     """
     When a config is invalid.
@@ -37,3 +43,9 @@ class WrongFileFormat(MainException):
     """
     When a file is in an unexpected format.
     """
+
+
+class BuildFailure(MainException):
+    """
+    When some of the sites can't be built.
+    """
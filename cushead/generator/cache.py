@@ -0,0 +1,189 @@
+"""
+Handle the cache of generated files.
+"""
+from __future__ import annotations
+
+import collections
+import contextlib
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import Any
+from typing import Optional
+
+# Default maximum size of a cache folder, in bytes.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# Default maximum size of the data kept in memory by a memory cache, in bytes.
+DEFAULT_MEMORY_MAX_SIZE = 128 * 1024 * 1024
+
+
+def get_key(*parts: Any) -> str:
+    """
+    Get a cache key from the parts that define the content of an entry.
+
+    Args:
+        parts: the parts, which must have a stable representation.
+
+    Returns:
+        The key.
+    """
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class Cache:
+    """
+    Store data in a folder, addressed by keys.
+
+    The least recently used entries are removed when the folder exceeds its maximum size. Any error while reading or
+    writing an entry is handled as a cache miss, so a broken cache never breaks a generation.
+    """
+
+    def __init__(self, *, path: pathlib.Path, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Initialize a cache.
+
+        Args:
+            path: the cache folder. It's created if it doesn't exist.
+            max_size: the maximum size of the folder, in bytes.
+        """
+        self.path = path
+        self.max_size = max_size
+
+    def get(self, *, key: str) -> Optional[bytes]:
+        """
+        Get the data of an entry and mark it as recently used.
+
+        Args:
+            key: the entry key.
+
+        Returns:
+            The data, or None if the entry doesn't exist.
+        """
+        entry_path = self.path / key
+        try:
+            data = entry_path.read_bytes()
+            os.utime(entry_path)
+        except OSError:
+            return None
+        return data
+
+    def set(self, *, key: str, data: bytes) -> None:
+        """
+        Store the data of an entry.
+
+        The data is written to a temporary file and then moved to its place, so other processes that use the same
+        folder never read an incomplete entry.
+
+        Args:
+            key: the entry key.
+            data: the data.
+        """
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        except OSError:
+            return
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, self.path / key)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temporary_path)
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the folder size is under the maximum size.
+        """
+        try:
+            entries = [(entry.stat(), entry) for entry in os.scandir(self.path) if entry.is_file() and not entry.name.startswith(".")]
+        except OSError:
+            return
+
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            size -= stat.st_size
+
+
+class MemoryCache:
+    """
+    Store data in memory, addressed by keys, in front of an optional folder cache.
+
+    It lets the generations of a process share their data. The least recently used entries are dropped from memory when
+    they exceed the maximum size, but they are kept by the folder cache.
+    """
+
+    def __init__(self, *, max_size: int = DEFAULT_MEMORY_MAX_SIZE, cache: Optional[Cache] = None) -> None:
+        """
+        Initialize a memory cache.
+
+        Args:
+            max_size: the maximum size of the data kept in memory, in bytes.
+            cache: a folder cache used for the entries that aren't in memory.
+        """
+        self.max_size = max_size
+        self.cache = cache
+        self.entries: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+        self.size = 0
+
+    def get(self, *, key: str) -> Optional[bytes]:
+        """
+        Get the data of an entry and mark it as recently used.
+
+        Args:
+            key: the entry key.
+
+        Returns:
+            The data, or None if the entry doesn't exist.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.cache is None:
+            return None
+        data = self.cache.get(key=key)
+        if data is not None:
+            self.keep(key=key, data=data)
+        return data
+
+    def set(self, *, key: str, data: bytes) -> None:
+        """
+        Store the data of an entry.
+
+        Args:
+            key: the entry key.
+            data: the data.
+        """
+        self.keep(key=key, data=data)
+        if self.cache is not None:
+            self.cache.set(key=key, data=data)
+
+    def keep(self, *, key: str, data: bytes) -> None:
+        """
+        Keep the data of an entry in memory, dropping the least recently used entries that exceed the maximum size.
+
+        Args:
+            key: the entry key.
+            data: the data.
+        """
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_size:
+            _, dropped_data = self.entries.popitem(last=False)
+            self.size -= len(dropped_data)
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries of the folder cache until its size is under its maximum size.
+        """
+        if self.cache is not None:
+            self.cache.evict()
@@ -0,0 +1,85 @@
+"""
+Handle the precompressed versions of the generated text files.
+"""
+import functools
+import gzip
+import pathlib
+import types
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from cushead.generator import files
+
+# Extensions of the text files that are compressed. The images are already compressed.
+COMPRESSIBLE_SUFFIXES = {".css", ".html", ".js", ".json", ".svg", ".txt", ".xml"}
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+GZIP_SUFFIX = ".gz"
+BROTLI_SUFFIX = ".br"
+
+
+@functools.lru_cache(maxsize=None)
+def get_brotli() -> Optional[types.ModuleType]:
+    """
+    Get the brotli module, which is an optional dependency.
+
+    Returns:
+        The module, or None if it isn't installed.
+    """
+    try:
+        # Imported here because it's optional.
+        import brotli  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return brotli
+
+
+def is_compressible(*, path: pathlib.Path) -> bool:
+    """
+    Check if a file is compressible.
+
+    Args:
+        path: the file path.
+
+    Returns:
+        If the file is compressible.
+    """
+    return path.suffix in COMPRESSIBLE_SUFFIXES
+
+
+def get_version_paths(*, path: pathlib.Path) -> Tuple[pathlib.Path, ...]:
+    """
+    Get the paths of the precompressed versions of a file, including the brotli one if the module isn't installed.
+
+    Args:
+        path: the file path.
+
+    Returns:
+        The gzip and brotli versions paths.
+    """
+    return tuple(path.with_name(f"{path.name}{suffix}") for suffix in (GZIP_SUFFIX, BROTLI_SUFFIX))
+
+
+def compress_file(*, file: files.File) -> List[files.File]:
+    """
+    Get the precompressed versions of a file, at the maximum compression.
+
+    The gzip version has the .gz extension added, and the brotli version, which is generated if the brotli module is
+    installed, has the .br extension added. The gzip header doesn't have a modification time, so the same data always
+    produces the same file. The versions that aren't smaller than the file are skipped, and the files creator removes
+    the ones written by previous builds.
+
+    Args:
+        file: the file.
+
+    Returns:
+        The compressed versions.
+    """
+    data = bytes(file.data)
+    gzip_path, brotli_path = get_version_paths(path=pathlib.Path(file.path))
+    compressed_files = [files.File(path=gzip_path, data=gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))]
+    brotli = get_brotli()
+    if brotli is not None:
+        compressed_files.append(files.File(path=brotli_path, data=brotli.compress(data, quality=BROTLI_QUALITY)))
+    return [compressed_file for compressed_file in compressed_files if len(compressed_file.data) < len(data)]
@@ -1,11 +1,16 @@
 """
 Handle the config.
 """
+import contextlib
+import functools
+import importlib
 import pathlib
 import re
 from typing import Any
 from typing import Literal
+from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
 from typing import TypedDict
 from typing import Union
 from typing import overload
@@ -18,6 +23,31 @@ from PIL import PngImagePlugin
 from cushead import exceptions
 
 
+class ImageFormat(NamedTuple):
+    """
+    Store data about a format in which the images are also generated.
+    """
+
+    # The Pillow format name.
+    name: str
+    suffix: str
+    mime_type: str
+    # The encoder options, as pairs of name and value, so the format can be hashed.
+    options: Tuple[Tuple[str, Any], ...]
+
+
+class PngProfile(NamedTuple):
+    """
+    Store the settings of the PNG encoder.
+    """
+
+    # The options of the Pillow PNG encoder, as pairs of name and value.
+    options: Tuple[Tuple[str, Any], ...]
+    # If the big images with 256 colors or fewer are also encoded with a palette, like the small ones always are. The
+    # version with the palette is kept if it's smaller.
+    palette: bool = False
+
+
 class Config(TypedDict):
     """
     The parsed config structure.
@@ -47,6 +77,60 @@ class Config(TypedDict):
     twitter_user_id: Optional[str]
     itunes_app_id: Optional[str]
     itunes_affiliate_data: Optional[str]
+    # The formats in which the images are also generated, which are the modern formats that Pillow can encode if the
+    # config enables them.
+    modern_images: Tuple[ImageFormat, ...]
+    # The name of the PNG encoder profile.
+    png_profile: str
+
+
+# The PNG encoder profiles. The balanced one has the Pillow defaults, the fast one barely compresses, for development
+# builds, and the smallest one compresses as much as possible, for release builds.
+PNG_PROFILES = {
+    "fast": PngProfile(options=(("compress_level", 1),)),
+    "balanced": PngProfile(options=()),
+    "smallest": PngProfile(options=(("compress_level", 9), ("optimize", True)), palette=True),
+}
+DEFAULT_PNG_PROFILE = "balanced"
+# The validators are built once and reused by all the configs validated by the process.
+CONFIG_SCHEMA = schema.Schema(
+    {
+        "static_url": str,
+        schema.Optional("favicon_ico"): schema.Or(None, str),
+        schema.Optional("favicon_png"): schema.Or(None, str),
+        schema.Optional("favicon_svg"): schema.Or(None, str),
+        schema.Optional("preview_png"): schema.Or(None, str),
+        schema.Optional("google_tag_manager"): schema.Or(None, str),
+        schema.Optional("language"): schema.Or(None, str),
+        schema.Optional("territory"): schema.Or(None, str),
+        schema.Optional("domain"): schema.Or(None, str),
+        schema.Optional("text_dir"): schema.Or(None, str),
+        schema.Optional("title"): schema.Or(None, str),
+        schema.Optional("description"): schema.Or(None, str),
+        schema.Optional("subject"): schema.Or(None, str),
+        schema.Optional("main_color"): schema.Or(None, str),
+        schema.Optional("background_color"): schema.Or(None, str),
+        schema.Optional("author_name"): schema.Or(None, str),
+        schema.Optional("author_email"): schema.Or(None, str),
+        schema.Optional("facebook_app_id"): schema.Or(None, str),
+        schema.Optional("twitter_username"): schema.Or(None, str),
+        schema.Optional("twitter_user_id"): schema.Or(None, str),
+        schema.Optional("itunes_app_id"): schema.Or(None, str),
+        schema.Optional("itunes_affiliate_data"): schema.Or(None, str),
+        schema.Optional("output_folder"): schema.Or(None, str),
+        schema.Optional("modern_images"): schema.Or(None, bool),
+        schema.Optional("png_profile"): schema.Or(None, *PNG_PROFILES),
+    }
+)
+STATIC_URL_PATTERN = re.compile("^((https?://|/).*)?$")
+HEX_COLOR_PATTERN = re.compile("^#(?:[0-9A-Fa-f]{3}){1,2}$")
+# The modern formats in which the images can also be generated, with their encoder options. The WebP versions are
+# lossless, like the PNG ones. The lossless AVIF versions are usually bigger than the PNG ones, so they are lossy, at a
+# quality at which the difference isn't visible.
+MODERN_IMAGE_FORMATS = (
+    ImageFormat(name="WEBP", suffix=".webp", mime_type="image/webp", options=(("lossless", True), ("quality", 100), ("method", 6))),
+    ImageFormat(name="AVIF", suffix=".avif", mime_type="image/avif", options=(("quality", 90),)),
+)
 
 
 def validate_config(*, config: Any) -> None:
@@ -59,34 +143,8 @@ def validate_config(*, config: Any) -> None:
     Raises:
         InvalidConfig: when the config isn't valid.
     """
-    default_schema = schema.Schema(
-        {
-            "static_url": str,
-            schema.Optional("favicon_ico"): schema.Or(None, str),
-            schema.Optional("favicon_png"): schema.Or(None, str),
-            schema.Optional("favicon_svg"): schema.Or(None, str),
-            schema.Optional("preview_png"): schema.Or(None, str),
-            schema.Optional("google_tag_manager"): schema.Or(None, str),
-            schema.Optional("language"): schema.Or(None, str),
-            schema.Optional("territory"): schema.Or(None, str),
-            schema.Optional("domain"): schema.Or(None, str),
-            schema.Optional("text_dir"): schema.Or(None, str),
-            schema.Optional("title"): schema.Or(None, str),
-            schema.Optional("description"): schema.Or(None, str),
-            schema.Optional("subject"): schema.Or(None, str),
-            schema.Optional("main_color"): schema.Or(None, str),
-            schema.Optional("background_color"): schema.Or(None, str),
-            schema.Optional("author_name"): schema.Or(None, str),
-            schema.Optional("author_email"): schema.Or(None, str),
-            schema.Optional("facebook_app_id"): schema.Or(None, str),
-            schema.Optional("twitter_username"): schema.Or(None, str),
-            schema.Optional("twitter_user_id"): schema.Or(None, str),
-            schema.Optional("itunes_app_id"): schema.Or(None, str),
-            schema.Optional("itunes_affiliate_data"): schema.Or(None, str),
-        }
-    )
     try:
-        default_schema.validate(config)
+        CONFIG_SCHEMA.validate(config)
     except (
         schema.SchemaWrongKeyError,
         schema.SchemaMissingKeyError,
@@ -94,14 +152,13 @@ def validate_config(*, config: Any) -> None:
     ) as exception:
         raise exceptions.InvalidConfig(exception)
 
-    if not re.match("^((https?://|/).*)?$", config["static_url"]):
+    if not STATIC_URL_PATTERN.match(config["static_url"]):
         raise exceptions.InvalidConfig("The key static_url must starts with a slash, http://, https:// or be an empty string.")
     if config["static_url"].endswith("/"):
         raise exceptions.InvalidConfig("The key static_url can't end with a slash.")
 
-    hex_color = re.compile("^#(?:[0-9A-Fa-f]{3}){1,2}$")
     for color_key in ("main_color", "background_color"):
-        if config.get(color_key) and not hex_color.match(config[color_key]):
+        if config.get(color_key) and not HEX_COLOR_PATTERN.match(config[color_key]):
             raise exceptions.InvalidConfig(f"The key {color_key} must be a hex color code. If you don't want any value on this key, set the value to null.")
 
 
@@ -119,6 +176,8 @@ def load_binary_image(*, key, path, expected_format):
     """
     Load a binary type image.
 
+    Only the image header is read, to check its format. The pixels aren't decoded until they are needed.
+
     Args:
         path: the image path.
         expected_format: the expected format of the image.
@@ -172,20 +231,78 @@ def load_binary_image(*, key, path, expected_format):
             ),
         )
 
-    # Verify the image. After this, need to close it.
-    image.verify()
-    image.close()
+    # The pixels are decoded and validated later, only if they are needed, by decode_binary_image.
+    return image
+
+
+def decode_binary_image(*, image: Image.Image) -> None:
+    """
+    Decode the pixels of an image loaded with load_binary_image.
+
+    The file is read and validated while it's decoded, only once. The next calls don't do anything.
 
-    return Image.open(path)
+    Args:
+        image: the image instance.
+
+    Raises:
+        WrongFileFormat: when the image data is corrupted.
+    """
+    try:
+        image.load()
+    except (OSError, SyntaxError) as exception:
+        path = pathlib.Path(getattr(image, "filename", ""))
+        raise exceptions.WrongFileFormat(
+            "\n".join(
+                (
+                    f"Can't decode the image ({path}).",
+                    f"ABSOLUTE PATH: {path.absolute()}",
+                    f"Exception: {exception}",
+                ),
+            ),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_modern_image_formats() -> Tuple[ImageFormat, ...]:
+    """
+    Get the modern image formats that the installed Pillow can encode.
+
+    Pillow encodes WebP if it was built with libwebp, and AVIF if it was built with libavif or if the pillow-avif-plugin
+    package is installed.
+
+    Returns:
+        The formats.
+    """
+    with contextlib.suppress(ImportError):
+        # The plugin is optional. Importing it registers the AVIF format in the Pillow versions that don't have it.
+        importlib.import_module("pillow_avif")
+    Image.init()
+    return tuple(image_format for image_format in MODERN_IMAGE_FORMATS if image_format.name in Image.SAVE)
+
+
+def get_output_folder_path(*, path: pathlib.Path, config: Any, default_output_folder: str = "output") -> pathlib.Path:
+    """
+    Get the folder where the files of a config are generated.
+
+    Args:
+        path: the config file source path.
+        config: the config.
+        default_output_folder: the output folder, relative to the source path, used if the config doesn't set one.
+
+    Returns:
+        The output folder path.
+    """
+    return path / (config.get("output_folder") or default_output_folder)
 
 
-def parse_config(*, path: pathlib.Path, config: Any) -> Config:
+def parse_config(*, path: pathlib.Path, config: Any, default_output_folder: str = "output") -> Config:
     """
     Parse a config.
 
     Args:
         path: the config file source path.
         config: the config.
+        default_output_folder: the output folder, relative to the source path, used if the config doesn't set one.
 
     Returns:
         A new dict with the parsed config.
@@ -212,7 +329,7 @@ def parse_config(*, path: pathlib.Path, config: Any) -> Config:
 
     return {
         "main_folder_path": path,
-        "output_folder_path": path / "output",
+        "output_folder_path": get_output_folder_path(path=path, config=config, default_output_folder=default_output_folder),
         "static_url": str(config["static_url"]),
         "favicon_ico": favicon_ico,
         "favicon_png": favicon_png,
@@ -235,4 +352,6 @@ def parse_config(*, path: pathlib.Path, config: Any) -> Config:
         "twitter_user_id": config.get("twitter_user_id"),
         "itunes_app_id": config.get("itunes_app_id"),
         "itunes_affiliate_data": config.get("itunes_affiliate_data"),
+        "modern_images": get_modern_image_formats() if config.get("modern_images") else (),
+        "png_profile": config.get("png_profile") or DEFAULT_PNG_PROFILE,
     }
@@ -1,13 +1,36 @@
 """
 Handle files generation.
 """
+from __future__ import annotations
+
+import collections
+import functools
 import pathlib
+from concurrent import futures
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Collection
+from typing import Deque
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
 from typing import NamedTuple
+from typing import Optional
+from typing import Set
 from typing import Tuple
+from typing import TypeVar
+from typing import Union
+
+if TYPE_CHECKING:
+    from cushead.generator import cache as generator_cache
+    from cushead.generator import config as generator_config
 
-from cushead.generator import config as generator_config
-from cushead.generator import images
-from cushead.generator.templates import templates
+Item = TypeVar("Item")
+Result = TypeVar("Result")
 
 
 class File(NamedTuple):
@@ -16,20 +39,138 @@ class File(NamedTuple):
     """
 
     path: pathlib.Path
-    data: bytes
+    data: Union[bytes, memoryview]
 
 
-def generate_files(*, config: generator_config.Config) -> Tuple[File, ...]:
+class Dependencies(NamedTuple):
     """
-    Get the images and templates to create.
+    Store the inputs from which a file is generated.
+    """
+
+    # The file path, relative to the output folder.
+    path: str
+    # The config keys that are read to generate the file, or to decide if it's generated.
+    keys: FrozenSet[str]
+    # The config keys of the source images whose content is read to generate the file.
+    sources: FrozenSet[str]
+    # Groups of config keys. The file is generated if at least one key of each group is set.
+    conditions: Tuple[FrozenSet[str], ...]
+
+
+def check_conditions(*, conditions: Iterable[FrozenSet[str]], config: Mapping[str, Any]) -> bool:
+    """
+    Check if a config sets at least one key of each group of keys.
 
     Args:
+        conditions: the groups of keys.
         config: the config.
 
     Returns:
-        The images and templates.
+        If the conditions are met.
+    """
+    return all(any(config.get(key) for key in keys) for keys in conditions)
+
+
+@functools.lru_cache(maxsize=None)
+def get_dependency_graph() -> Dict[str, Dependencies]:
+    """
+    Get the inputs of each file that can be generated.
+
+    Returns:
+        The dependencies of each file, by its path relative to the output folder.
+    """
+    # Imported here because they import PIL and jinja2, and this module is also used to create files that don't need them.
+    from cushead.generator import images  # pylint: disable=import-outside-toplevel
+    from cushead.generator.templates import templates  # pylint: disable=import-outside-toplevel
+
+    return {dependencies.path: dependencies for dependencies in (*images.get_images_dependencies(), *templates.get_templates_dependencies())}
+
+
+def get_affected_files(*, keys: Collection[str], sources: Collection[str]) -> Set[str]:
+    """
+    Get the files that depend on some inputs.
+
+    Args:
+        keys: the config keys whose values changed.
+        sources: the config keys of the source images whose content changed.
+
+    Returns:
+        The paths of the files, relative to the output folder.
+    """
+    return {path for path, dependencies in get_dependency_graph().items() if dependencies.keys & set(keys) or dependencies.sources & set(sources)}
+
+
+def map_lazily(*, executor: futures.Executor, function: Callable[[Item], Result], items: Iterable[Item], window: int) -> Iterator[Result]:
+    """
+    Map a function over some items using an executor, keeping a limited number of tasks in flight.
+
+    Unlike Executor.map, the items are submitted as the results are consumed, so the results that are waiting to be
+    consumed never exceed the window.
+
+    Args:
+        executor: the executor.
+        function: the function.
+        items: the items.
+        window: the maximum number of tasks in flight.
+
+    Yields:
+        The results, in the order of the items.
+    """
+    pending_tasks: Deque[futures.Future[Result]] = collections.deque()
+    for item in items:
+        pending_tasks.append(executor.submit(function, item))
+        if len(pending_tasks) >= window:
+            yield pending_tasks.popleft().result()
+    while pending_tasks:
+        yield pending_tasks.popleft().result()
+
+
+def generate_files(
+    *,
+    config: generator_config.Config,
+    jobs: int = 1,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    paths: Optional[Collection[str]] = None,
+    compress: bool = False,
+) -> Iterator[File]:
     """
-    return (
-        *images.generate_images(config=config),
-        *templates.generate_templates(config=config),
-    )
+    Get the images and templates to create.
+
+    The files are generated one at a time as they are consumed, so they can be written and released before the next
+    one is generated.
+
+    Args:
+        config: the config.
+        jobs: the number of workers used to generate the images.
+        cache: the cache of generated images.
+        paths: the paths, relative to the output folder, of the files to generate. All of them by default.
+        compress: if it's True, the precompressed versions of the text files are also generated.
+
+    Yields:
+        The images and templates, and then their precompressed versions.
+    """
+    # Imported here because they import PIL and jinja2, and this module is also used to create files that don't need them.
+    from cushead.generator import images  # pylint: disable=import-outside-toplevel
+    from cushead.generator.templates import templates  # pylint: disable=import-outside-toplevel
+
+    if not compress:
+        yield from images.generate_images(config=config, jobs=jobs, cache=cache, paths=paths)
+        yield from templates.generate_templates(config=config, paths=paths)
+        return
+
+    # Imported here because it's only needed to compress the files.
+    from cushead.generator import compression  # pylint: disable=import-outside-toplevel
+
+    # The templates are rendered first, which is fast, so they are compressed in the background while the images are
+    # generated. The compressed versions are yielded at the end, in the order of their files.
+    rendered_templates = list(templates.generate_templates(config=config, paths=paths))
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        templates_tasks = [executor.submit(compression.compress_file, file=file) for file in rendered_templates if compression.is_compressible(path=file.path)]
+        images_tasks: List[futures.Future[List[File]]] = []
+        for image in images.generate_images(config=config, jobs=jobs, cache=cache, paths=paths):
+            if compression.is_compressible(path=image.path):
+                images_tasks.append(executor.submit(compression.compress_file, file=image))
+            yield image
+        yield from rendered_templates
+        for task in (*images_tasks, *templates_tasks):
+            yield from task.result()
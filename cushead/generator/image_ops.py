@@ -0,0 +1,220 @@
+"""
+Handle the operations over the pixels of several images at once.
+
+The operations use Pillow, or NumPy if it's requested and installed. Both implementations produce the same pixels, with
+the rounding of the Pillow paste method, so the generated images don't depend on NumPy. Pillow is the default because
+its paste method blends in a single pass, which is faster than the NumPy arrays, as benchmarks/image_ops.py shows.
+"""
+import functools
+import math
+import types
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from PIL import Image
+from PIL import ImageColor
+
+# The color of the transparent canvases.
+TRANSPARENT_COLOR = (255, 255, 255, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_numpy() -> Optional[types.ModuleType]:
+    """
+    Get the numpy module, which is an optional dependency.
+
+    Returns:
+        The module, or None if it isn't installed.
+    """
+    try:
+        # Imported here because it's optional.
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+def get_contained_size(*, size: Tuple[int, int], width: int, height: int) -> Tuple[int, int]:
+    """
+    Get the size of an image scaled down to fit inside a box, preserving its aspect ratio.
+
+    The rounding is the same used by the Pillow thumbnail method.
+
+    Args:
+        size: the image size.
+        width: the box width.
+        height: the box height.
+
+    Returns:
+        The new size.
+    """
+    if width >= size[0] and height >= size[1]:
+        return size
+
+    aspect = size[0] / size[1]
+    if width / height >= aspect:
+        candidates = (math.floor(height * aspect), math.ceil(height * aspect))
+        return max(min(candidates, key=lambda number: abs(aspect - number / height)), 1), height
+    candidates = (math.floor(width / aspect), math.ceil(width / aspect))
+    return width, max(min(candidates, key=lambda number: 0 if number == 0 else abs(aspect - width / number)), 1)
+
+
+def get_centered_position(*, size: Tuple[int, int], width: int, height: int) -> Tuple[int, int]:
+    """
+    Get the position of an image centered over a canvas.
+
+    Args:
+        size: the image size.
+        width: the canvas width.
+        height: the canvas height.
+
+    Returns:
+        The position of the top left corner of the image.
+    """
+    return math.ceil((width - size[0]) / 2), math.ceil((height - size[1]) / 2)
+
+
+def blend_arrays(*, numpy: types.ModuleType, destination: Any, source: Any, mask: Any) -> Any:
+    """
+    Blend an array of pixels over another one, with the rounding of the Pillow paste method.
+
+    Args:
+        numpy: the numpy module.
+        destination: the pixels below.
+        source: the pixels above, with the same shape.
+        mask: the opacity of the source pixels, with a single channel.
+
+    Returns:
+        The blended pixels.
+    """
+    # The products of two bytes, plus the rounding, fit in 16 bits.
+    mask = mask.astype(numpy.uint16)
+    value = source * mask
+    value += destination * (255 - mask)
+    value += 128
+    value += value >> 8
+    value >>= 8
+    return value.astype(numpy.uint8)
+
+
+def flatten_alpha(*, images: Sequence[Image.Image], color: str, use_numpy: bool = False) -> List[Image.Image]:
+    """
+    Fill the transparent pixels of several images with a color.
+
+    With NumPy, the images of the same size are blended at once, as a single array.
+
+    Args:
+        images: the images.
+        color: the color, as a hex color code.
+        use_numpy: if it's True, NumPy is used if it's installed.
+
+    Returns:
+        New RGBA images, in the same order.
+    """
+    rgba_color = ImageColor.getrgb(color)[:3] + (255,)
+    numpy = get_numpy() if use_numpy else None
+    if numpy is None:
+        flattened_images = []
+        for image in images:
+            flattened_image = Image.new("RGBA", image.size, rgba_color)
+            flattened_image.paste(image, mask=image.convert("RGBA").getchannel("A"))
+            flattened_images.append(flattened_image)
+        return flattened_images
+
+    images_by_size: Dict[Tuple[int, int], List[int]] = {}
+    for index, image in enumerate(images):
+        images_by_size.setdefault(image.size, []).append(index)
+    flattened_images_by_index: Dict[int, Image.Image] = {}
+    for indexes in images_by_size.values():
+        pixels = numpy.stack([numpy.asarray(images[index].convert("RGBA")) for index in indexes])
+        canvas = numpy.array(rgba_color, dtype=numpy.uint8)
+        blended_pixels = blend_arrays(numpy=numpy, destination=canvas, source=pixels, mask=pixels[..., 3:])
+        flattened_images_by_index.update((index, Image.fromarray(image_pixels, "RGBA")) for index, image_pixels in zip(indexes, blended_pixels))
+    return [flattened_images_by_index[index] for index in range(len(images))]
+
+
+def pad_to_canvas(*, images: Sequence[Image.Image], width: int, height: int, color: Optional[str] = None, use_numpy: bool = False) -> List[Image.Image]:
+    """
+    Center several images over canvases of the same size.
+
+    With a color, the canvases are opaque RGB images, and the images are blended over them with their alpha channel.
+    Without it, the canvases are transparent RGBA images, and the images replace their pixels. With NumPy, all the
+    canvases are filled at once, as a single array.
+
+    Args:
+        images: the images, which must fit inside the canvases.
+        width: the canvases width.
+        height: the canvases height.
+        color: the canvases color, as a hex color code.
+        use_numpy: if it's True, NumPy is used if it's installed.
+
+    Returns:
+        The canvases, in the same order.
+    """
+    mode = "RGB" if color else "RGBA"
+    canvas_color = ImageColor.getrgb(color)[:3] if color else TRANSPARENT_COLOR
+    numpy = get_numpy() if use_numpy else None
+    if numpy is None:
+        canvases = []
+        for image in images:
+            canvas = Image.new(mode, (width, height), canvas_color)
+            position = get_centered_position(size=image.size, width=width, height=height)
+            if color:
+                canvas.paste(image, position, mask=image.convert("RGBA").getchannel("A"))
+            else:
+                canvas.paste(image, position)
+            canvases.append(canvas)
+        return canvases
+
+    canvases_pixels = numpy.empty((len(images), height, width, len(canvas_color)), dtype=numpy.uint8)
+    canvases_pixels[...] = canvas_color
+    for canvas_pixels, image in zip(canvases_pixels, images):
+        left, top = get_centered_position(size=image.size, width=width, height=height)
+        region = canvas_pixels[top : top + image.height, left : left + image.width]
+        pixels = numpy.asarray(image.convert("RGBA"))
+        if color:
+            region[...] = blend_arrays(numpy=numpy, destination=region, source=pixels[..., :3], mask=pixels[..., 3:])
+        else:
+            region[...] = pixels
+    return [Image.fromarray(canvas_pixels, mode) for canvas_pixels in canvases_pixels]
+
+
+def contain(
+    *,
+    images: Sequence[Image.Image],
+    width: int,
+    height: int,
+    levels: Optional[Sequence[Image.Image]] = None,
+    reducing_gap: Optional[float] = None,
+    use_numpy: bool = False,
+) -> List[Image.Image]:
+    """
+    Resize several images to fit inside a size, preserving their aspect ratio, and center them over transparent canvases.
+
+    The images that fit the size exactly aren't padded, and the ones that already have their size aren't resized.
+
+    Args:
+        images: the images.
+        width: the width.
+        height: the height.
+        levels: for each image, a reduced version of it from which it's resized. The image itself by default.
+        reducing_gap: the reducing gap of the Pillow resize method.
+        use_numpy: if it's True, NumPy is used if it's installed.
+
+    Returns:
+        The resized images, in the same order.
+    """
+    resized_images = []
+    for image, level in zip(images, levels or images):
+        size = get_contained_size(size=image.size, width=width, height=height)
+        resized_images.append(level if level.size == size else level.resize(size, Image.LANCZOS, reducing_gap=reducing_gap))
+
+    padded_indexes = [index for index, resized_image in enumerate(resized_images) if resized_image.size != (width, height)]
+    padded_images = pad_to_canvas(images=[resized_images[index] for index in padded_indexes], width=width, height=height, use_numpy=use_numpy)
+    for index, padded_image in zip(padded_indexes, padded_images):
+        resized_images[index] = padded_image
+    return resized_images
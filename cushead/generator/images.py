@@ -3,23 +3,36 @@ Handle images generation.
 """
 from __future__ import annotations
 
+import contextlib
+import hashlib
 import io
+import math
 import pathlib
+import sys
+from concurrent import futures
+from typing import Collection
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import NamedTuple
 from typing import Optional
+from typing import Sequence
+from typing import Set
 from typing import Tuple
 from typing import Union
 from typing import overload
 
+import PIL
 from PIL import IcoImagePlugin
 from PIL import Image
-from PIL import ImageColor
 from PIL import PngImagePlugin
-from resizeimage import resizeimage
 
+from cushead.generator import cache as generator_cache
 from cushead.generator import config as generator_config
 from cushead.generator import files
+from cushead.generator import image_ops
 
 
 class ImageData(NamedTuple):
@@ -30,31 +43,241 @@ class ImageData(NamedTuple):
     path: pathlib.Path
     width: int
     height: int
+    image: Optional[PngImagePlugin.PngImageFile] = None
+    background_color: Optional[str] = None
+    # The formats in which the image is also generated, besides PNG.
+    formats: Tuple[generator_config.ImageFormat, ...] = ()
+    # If the image is a startup screen, where the image is a logo centered over a canvas of the background color.
+    startup: bool = False
+    # The name of the PNG encoder profile.
+    png_profile: str = generator_config.DEFAULT_PNG_PROFILE
+
+
+class ImageJob(NamedTuple):
+    """
+    Store the data that defines the content of an image.
+
+    Images with the same job have the same bytes, so each job is rendered once.
+    """
+
+    source_id: int
+    width: int
+    height: int
+    background_color: Optional[str]
+    formats: Tuple[generator_config.ImageFormat, ...]
+    startup: bool
+    png_profile: str
+
+
+class ImageOutput(NamedTuple):
+    """
+    Store data about an image resized from a source image of the config.
+    """
+
+    # The image path, relative to the output folder.
+    path: str
+    # The config key of the source image.
+    source: str
+    width: int
+    height: int
+    # Groups of config keys. The image is generated if its source and at least one key of each group are set.
+    conditions: Tuple[FrozenSet[str], ...] = ()
+    # If the transparent pixels are filled with the background color of the config.
+    opaque: bool = False
+    # If the image is a startup screen, where the source is a logo centered over a canvas of the background color.
+    startup: bool = False
+
+
+# Minimum ratio between the size of an image and the size to which it is resized with LANCZOS. Below it, the image is
+# first reduced with a box filter by an integer factor. It's the same value used by the Pillow thumbnail method.
+REDUCING_GAP = 2.0
+
+# The config key that enables the generation of the images in modern formats.
+MODERN_IMAGES_KEY = "modern_images"
+
+# The config key of the PNG encoder profile.
+PNG_PROFILE_KEY = "png_profile"
+
+# Version of the images rendering. Increase it when the rendering changes, to invalidate the cached images.
+RENDER_VERSION = 3
+
+# Size of the logo of the startup screens, relative to the shorter side of the screen.
+STARTUP_LOGO_RATIO = 0.4
+
+# Maximum number of colors of a PNG palette.
+PALETTE_SIZE = 256
+
+# Maximum number of pixels of the images that are always tried with a palette, which covers the icons up to 228x228.
+# The pixels of a palette image are mapped one by one, so the bigger images are only tried by the profiles that ask for
+# it.
+PALETTE_MAX_PIXELS = 256 * 256
+
+# Modes that the box filter of Pillow can reduce. The sources in other modes, like palette images, are converted to RGBA.
+REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA"}
+
+# Modes with an alpha channel and their premultiplied version, in which the box filter doesn't bleed the color of
+# transparent pixels.
+PREMULTIPLIED_MODES = {"LA": "La", "RGBA": "RGBa"}
+
+# The config keys of the source images.
+SOURCES_KEYS = ("favicon_ico", "favicon_png", "favicon_svg", "preview_png")
+
+# The images copied from a source image, by the config key of the source.
+COPIED_IMAGES = {"favicon_ico": "favicon.ico", "favicon_svg": "static/mask-icon.svg"}
+
+# The preview images are generated when the preview PNG is set, but they are resized from the favicon PNG.
+PREVIEW_CONDITIONS = (frozenset(("preview_png",)),)
+
+# The images resized from a source image, in the order in which they are generated.
+RESIZED_IMAGES = (
+    # OpenSearch.
+    ImageOutput(path="static/opensearch-16x16.png", source="favicon_png", width=16, height=16, conditions=(frozenset(("domain",)), frozenset(("title",)))),
+    # favicon PNG version, used by most browsers.
+    ImageOutput(path="static/favicon-16x16.png", source="favicon_png", width=16, height=16),
+    ImageOutput(path="static/favicon-32x32.png", source="favicon_png", width=32, height=32),
+    ImageOutput(path="static/favicon-96x96.png", source="favicon_png", width=96, height=96),
+    ImageOutput(path="static/favicon-192x192.png", source="favicon_png", width=192, height=192),
+    ImageOutput(path="static/favicon-194x194.png", source="favicon_png", width=194, height=194),
+    # Apple icon.
+    ImageOutput(path="static/apple-touch-icon-57x57.png", source="favicon_png", width=57, height=57),
+    ImageOutput(path="static/apple-touch-icon-60x60.png", source="favicon_png", width=60, height=60),
+    ImageOutput(path="static/apple-touch-icon-72x72.png", source="favicon_png", width=72, height=72),
+    ImageOutput(path="static/apple-touch-icon-76x76.png", source="favicon_png", width=76, height=76),
+    ImageOutput(path="static/apple-touch-icon-114x114.png", source="favicon_png", width=114, height=114),
+    ImageOutput(path="static/apple-touch-icon-120x120.png", source="favicon_png", width=120, height=120),
+    ImageOutput(path="static/apple-touch-icon-128x128.png", source="favicon_png", width=128, height=128),
+    ImageOutput(path="static/apple-touch-icon-144x144.png", source="favicon_png", width=144, height=144),
+    ImageOutput(path="static/apple-touch-icon-152x152.png", source="favicon_png", width=152, height=152),
+    ImageOutput(path="static/apple-touch-icon-167x167.png", source="favicon_png", width=167, height=167),
+    ImageOutput(path="static/apple-touch-icon-180x180.png", source="favicon_png", width=180, height=180),
+    ImageOutput(path="static/apple-touch-icon-195x195.png", source="favicon_png", width=195, height=195),
+    ImageOutput(path="static/apple-touch-icon-196x196.png", source="favicon_png", width=196, height=196),
+    ImageOutput(path="static/apple-touch-icon-228x228.png", source="favicon_png", width=228, height=228),
+    ImageOutput(path="static/apple-touch-icon-512x512.png", source="favicon_png", width=512, height=512),
+    ImageOutput(path="static/apple-touch-icon-1024x1024.png", source="favicon_png", width=1024, height=1024),
+    # browserconfig.
+    ImageOutput(path="static/browserconfig-30x30.png", source="favicon_png", width=30, height=30),
+    ImageOutput(path="static/browserconfig-44x44.png", source="favicon_png", width=44, height=44),
+    ImageOutput(path="static/browserconfig-70x70.png", source="favicon_png", width=70, height=70),
+    ImageOutput(path="static/browserconfig-150x150.png", source="favicon_png", width=150, height=150),
+    ImageOutput(path="static/browserconfig-310x150.png", source="favicon_png", width=310, height=150),
+    ImageOutput(path="static/browserconfig-310x310.png", source="favicon_png", width=310, height=310),
+    ImageOutput(path="static/browserconfig-144x144.png", source="favicon_png", width=144, height=144),
+    # manifest.
+    ImageOutput(path="static/manifest-192x192.png", source="favicon_png", width=192, height=192),
+    ImageOutput(path="static/manifest-512x512.png", source="favicon_png", width=512, height=512),
+    # Apple startup image.
+    # Source: https://github.com/onderceylan/pwa-asset-generator
+    ImageOutput(path="static/apple-touch-startup-image-1024x1024.png", source="favicon_png", width=1024, height=1024, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2048x2732.png", source="favicon_png", width=2048, height=2732, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2732x2048.png", source="favicon_png", width=2732, height=2048, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1668x2388.png", source="favicon_png", width=1668, height=2388, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2388x1668.png", source="favicon_png", width=2388, height=1668, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1668x2224.png", source="favicon_png", width=1668, height=2224, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2224x1668.png", source="favicon_png", width=2224, height=1668, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1536x2048.png", source="favicon_png", width=1536, height=2048, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2048x1536.png", source="favicon_png", width=2048, height=1536, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1242x2688.png", source="favicon_png", width=1242, height=2688, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2688x1242.png", source="favicon_png", width=2688, height=1242, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1125x2436.png", source="favicon_png", width=1125, height=2436, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2436x1125.png", source="favicon_png", width=2436, height=1125, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-828x1792.png", source="favicon_png", width=828, height=1792, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1792x828.png", source="favicon_png", width=1792, height=828, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1242x2208.png", source="favicon_png", width=1242, height=2208, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-2208x1242.png", source="favicon_png", width=2208, height=1242, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-750x1334.png", source="favicon_png", width=750, height=1334, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1334x750.png", source="favicon_png", width=1334, height=750, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-640x1136.png", source="favicon_png", width=640, height=1136, startup=True),
+    ImageOutput(path="static/apple-touch-startup-image-1136x640.png", source="favicon_png", width=1136, height=640, startup=True),
+    # Yandex.
+    ImageOutput(path="static/yandex.png", source="favicon_png", width=120, height=120, opaque=True),
+    # Open Graph.
+    ImageOutput(path="static/preview-600x600.png", source="favicon_png", width=600, height=600, conditions=PREVIEW_CONDITIONS),
+    ImageOutput(path="static/preview-1080x1080.png", source="favicon_png", width=1080, height=1080, conditions=PREVIEW_CONDITIONS),
+    # Twitter Cards.
+    ImageOutput(path="static/preview-600x600.png", source="favicon_png", width=600, height=600, conditions=PREVIEW_CONDITIONS),
+    # JSON-LD.
+    ImageOutput(path="static/preview-600x600.png", source="favicon_png", width=600, height=600, conditions=PREVIEW_CONDITIONS),
+)
+
+
+def get_image_pyramid(*, image: Image.Image, sizes: Iterable[Tuple[int, int]]) -> Tuple[Image.Image, ...]:
+    """
+    Get a downscale pyramid of an image.
+
+    The first level has the pixels of the image itself. Each of the next levels halves the previous one with a box
+    filter, until the next level would be smaller than the reducing gap applied to the smallest size. The levels are
+    kept in premultiplied alpha, so the transparent pixels don't bleed into the visible ones, and so Pillow doesn't
+    need to convert the image each time it's resized. The images in modes that can't be reduced are converted to RGBA.
+
+    Args:
+        image: a PIL image instance.
+        sizes: the sizes to which the image will be resized.
+
+    Returns:
+        The levels, from the largest to the smallest.
+    """
+    contained_sizes = sorted(image_ops.get_contained_size(size=image.size, width=width, height=height) for width, height in sizes)
+    if not contained_sizes:
+        return (image,)
+
+    min_width = min(width for width, _ in contained_sizes)
+    min_height = min(height for _, height in contained_sizes)
+    if image.mode not in REDUCIBLE_MODES:
+        image = image.convert("RGBA")
+    level = image.convert(PREMULTIPLIED_MODES[image.mode]) if image.mode in PREMULTIPLIED_MODES else image
+    levels = [level]
+    while math.ceil(level.width / 2) >= min_width * REDUCING_GAP and math.ceil(level.height / 2) >= min_height * REDUCING_GAP:
+        level = level.reduce(2)
+        levels.append(level)
+    return tuple(levels)
+
+
+def get_pyramid_level(*, pyramid: Sequence[Image.Image], width: int, height: int) -> Image.Image:
+    """
+    Get the smallest level of a pyramid from which an image can be resized to a size without loss of quality.
+
+    Args:
+        pyramid: the pyramid levels, from the largest to the smallest.
+        width: the width.
+        height: the height.
+
+    Returns:
+        The level.
+    """
+    for level in reversed(pyramid):
+        if level.width >= width * REDUCING_GAP and level.height >= height * REDUCING_GAP:
+            return level
+    return pyramid[0]
 
 
 @overload
-def get_resized_image(*, image: None, width: int, height: int) -> None:
+def get_resized_image(*, image: None, width: int, height: int, pyramid: Optional[Sequence[Image.Image]] = None) -> None:
     ...
 
 
 @overload
-def get_resized_image(*, image: IcoImagePlugin.IcoImageFile, width: int, height: int) -> IcoImagePlugin.IcoImageFile:
+def get_resized_image(*, image: IcoImagePlugin.IcoImageFile, width: int, height: int, pyramid: Optional[Sequence[Image.Image]] = None) -> IcoImagePlugin.IcoImageFile:
     ...
 
 
 @overload
-def get_resized_image(*, image: PngImagePlugin.PngImageFile, width: int, height: int) -> PngImagePlugin.PngImageFile:
+def get_resized_image(*, image: PngImagePlugin.PngImageFile, width: int, height: int, pyramid: Optional[Sequence[Image.Image]] = None) -> PngImagePlugin.PngImageFile:
     ...
 
 
-def get_resized_image(*, image, width, height):
+def get_resized_image(*, image, width, height, pyramid=None):
     """
     Get a resized version of an image.
 
+    The image is scaled down to fit inside the size, preserving its aspect ratio, and centered over a transparent
+    background.
+
     Args:
         image: a PIL image instance.
         width: the width.
         height : the height.
+        pyramid: a downscale pyramid of the image. If it's defined, the image is resized from its nearest larger level.
 
     Returns:
         A new image instance.
@@ -62,7 +285,14 @@ def get_resized_image(*, image, width, height):
     if image is None:
         return None
 
-    resized_image = resizeimage.resize_contain(image, (width, height))
+    size = image_ops.get_contained_size(size=image.size, width=width, height=height)
+    level = get_pyramid_level(pyramid=pyramid, width=size[0], height=size[1]) if pyramid else image
+    resized_image = image_ops.contain(images=(image,), width=width, height=height, levels=(level,), reducing_gap=REDUCING_GAP)[0]
+    if resized_image is image or resized_image.mode != "RGBA":
+        resized_image = resized_image.convert("RGBA")
+    # Like the transparent canvas, it doesn't keep the metadata of the source.
+    resized_image.info = {}
+
     resized_image.format = image.format
     return resized_image
 
@@ -91,20 +321,69 @@ def get_opaque_image(*, image, background_color):
     if image is None:
         return None
 
-    alpha = image.convert("RGBA").getchannel("A")
-    color = ImageColor.getrgb(background_color) + (255,)
-    new_image = Image.new("RGBA", image.size, color)
-    new_image.paste(image, mask=alpha)
+    new_image = image_ops.flatten_alpha(images=(image,), color=background_color)[0]
     new_image.format = image.format
     return new_image
 
 
-def get_image_bytes(*, image: Optional[Union[IcoImagePlugin.IcoImageFile, PngImagePlugin.PngImageFile]]) -> bytes:
+def get_startup_logo_size(*, width: int, height: int) -> int:
+    """
+    Get the size of the logo of a startup screen.
+
+    Args:
+        width: the screen width.
+        height: the screen height.
+
+    Returns:
+        The width and height of the logo.
+    """
+    return max(round(min(width, height) * STARTUP_LOGO_RATIO), 1)
+
+
+def get_startup_image(
+    *,
+    image: PngImagePlugin.PngImageFile,
+    width: int,
+    height: int,
+    background_color: Optional[str] = None,
+    pyramid: Optional[Sequence[Image.Image]] = None,
+) -> PngImagePlugin.PngImageFile:
+    """
+    Get a startup screen, with an image resized to the size of a logo and centered over a canvas.
+
+    Only the logo is resized, and the canvas is filled with a single color, so the screen costs much less to render and
+    encode than the image resized to the whole screen. An opaque canvas doesn't have an alpha channel.
+
+    Args:
+        image: a PIL image instance.
+        width: the screen width.
+        height: the screen height.
+        background_color: the canvas color. The canvas is transparent if it isn't defined.
+        pyramid: a downscale pyramid of the image.
+
+    Returns:
+        A new image instance.
+    """
+    logo_size = get_startup_logo_size(width=width, height=height)
+    logo = get_resized_image(image=image, width=logo_size, height=logo_size, pyramid=pyramid)
+    canvas = image_ops.pad_to_canvas(images=(logo,), width=width, height=height, color=background_color)[0]
+    canvas.format = image.format
+    return canvas
+
+
+def get_image_bytes(
+    *,
+    image: Optional[Union[IcoImagePlugin.IcoImageFile, PngImagePlugin.PngImageFile]],
+    image_format: Optional[generator_config.ImageFormat] = None,
+    png_profile: Optional[generator_config.PngProfile] = None,
+) -> bytes:
     """
     Get the bytes of an image.
 
     Args:
         image: a PIL image instance.
+        image_format: the format in which the image is encoded. The format of the image by default.
+        png_profile: the profile of the encoder, if the image is encoded in its own format. The Pillow defaults by default.
 
     Returns:
         The bytes.
@@ -113,142 +392,398 @@ def get_image_bytes(*, image: Optional[Union[IcoImagePlugin.IcoImageFile, PngIma
         return bytes()
 
     io_file = io.BytesIO()
-    image.save(io_file, format=image.format)
+    if image_format is None:
+        image.save(io_file, format=image.format, **dict(png_profile.options if png_profile else ()))
+    else:
+        image.save(io_file, format=image_format.name, **dict(image_format.options))
     return io_file.getvalue()
 
 
-def generate_images(*, config: generator_config.Config) -> List[files.File]:
+def get_palette_image(*, image: Image.Image) -> Optional[Image.Image]:
     """
-    Get the images ready to create.
+    Get a version of an image with a palette, if it has 256 colors or fewer, counting the alpha channel.
+
+    The palette has the exact colors of the image, so no pixel changes. The translucent colors go first, so the tRNS
+    chunk that stores their alpha ends at the last of them.
 
     Args:
-        config: the config.
+        image: a PIL image instance, in RGB or RGBA mode.
 
     Returns:
-        The images.
+        A new image instance, or None if the image has more colors.
     """
-    images = []
-    images_data: Tuple[ImageData, ...]
+    rgba_image = image.convert("RGBA")
+    colors = rgba_image.getcolors(maxcolors=PALETTE_SIZE)
+    if colors is None:
+        return None
 
-    if config.get("favicon_ico"):
-        images.append(
-            # favicon ICO version, used by most browsers and OpenSearch.
-            files.File(
-                path=config["output_folder_path"] / "favicon.ico",
-                data=get_image_bytes(image=config["favicon_ico"]),
-            )
-        )
+    palette = sorted((color for _, color in colors), key=lambda color: (color[3], color))
+    # Each pixel is read as a single integer with its four bytes, which is mapped to its index in the palette.
+    indexes = {int.from_bytes(bytes(color), sys.byteorder): index for index, color in enumerate(palette)}
+    pixels = memoryview(rgba_image.tobytes()).cast("I")
+    palette_image = Image.frombytes("P", image.size, bytes(map(indexes.__getitem__, pixels)))
+    palette_image.putpalette(b"".join(bytes(color[:3]) for color in palette))
+    transparency = bytes(color[3] for color in palette).rstrip(b"\xff")
+    if transparency:
+        palette_image.info["transparency"] = transparency
+    palette_image.format = image.format
+    return palette_image
 
-    if config.get("favicon_png"):
-        images_data = (
-            # favicon PNG version, used by most browsers.
-            ImageData(path=config["output_folder_path"] / "static" / "favicon-16x16.png", width=16, height=16),
-            ImageData(path=config["output_folder_path"] / "static" / "favicon-32x32.png", width=32, height=32),
-            ImageData(path=config["output_folder_path"] / "static" / "favicon-96x96.png", width=96, height=96),
-            ImageData(path=config["output_folder_path"] / "static" / "favicon-192x192.png", width=192, height=192),
-            ImageData(path=config["output_folder_path"] / "static" / "favicon-194x194.png", width=194, height=194),
-            # Apple icon.
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-57x57.png", width=57, height=57),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-60x60.png", width=60, height=60),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-72x72.png", width=72, height=72),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-76x76.png", width=76, height=76),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-114x114.png", width=114, height=114),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-120x120.png", width=120, height=120),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-128x128.png", width=128, height=128),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-144x144.png", width=144, height=144),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-152x152.png", width=152, height=152),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-167x167.png", width=167, height=167),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-180x180.png", width=180, height=180),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-195x195.png", width=195, height=195),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-196x196.png", width=196, height=196),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-228x228.png", width=228, height=228),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-512x512.png", width=512, height=512),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-icon-1024x1024.png", width=1024, height=1024),
-            # browserconfig.
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-30x30.png", width=30, height=30),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-44x44.png", width=44, height=44),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-70x70.png", width=70, height=70),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-150x150.png", width=150, height=150),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-310x150.png", width=310, height=150),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-310x310.png", width=310, height=310),
-            ImageData(path=config["output_folder_path"] / "static" / "browserconfig-144x144.png", width=144, height=144),
-            # manifest.
-            ImageData(path=config["output_folder_path"] / "static" / "manifest-192x192.png", width=192, height=192),
-            ImageData(path=config["output_folder_path"] / "static" / "manifest-512x512.png", width=512, height=512),
-            # Apple startup image.
-            # Source: https://github.com/onderceylan/pwa-asset-generator
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1024x1024.png", width=1024, height=1024),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2048x2732.png", width=2048, height=2732),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2732x2048.png", width=2732, height=2048),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1668x2388.png", width=1668, height=2388),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2388x1668.png", width=2388, height=1668),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1668x2224.png", width=1668, height=2224),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2224x1668.png", width=2224, height=1668),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1536x2048.png", width=1536, height=2048),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2048x1536.png", width=2048, height=1536),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1242x2688.png", width=1242, height=2688),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2688x1242.png", width=2688, height=1242),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1125x2436.png", width=1125, height=2436),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2436x1125.png", width=2436, height=1125),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-828x1792.png", width=828, height=1792),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1792x828.png", width=1792, height=828),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1242x2208.png", width=1242, height=2208),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-2208x1242.png", width=2208, height=1242),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-750x1334.png", width=750, height=1334),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1334x750.png", width=1334, height=750),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-640x1136.png", width=640, height=1136),
-            ImageData(path=config["output_folder_path"] / "static" / "apple-touch-startup-image-1136x640.png", width=1136, height=640),
-        )
-        if config.get("domain") and config.get("title"):
-            # OpenSearch.
-            images.append(
-                files.File(
-                    path=config["output_folder_path"] / "static" / "opensearch-16x16.png",
-                    data=get_image_bytes(image=get_resized_image(image=config["favicon_png"], width=16, height=16)),
-                ),
-            )
 
-        images.extend(
-            files.File(
-                path=image.path,
-                data=get_image_bytes(image=get_resized_image(image=config["favicon_png"], width=image.width, height=image.height)),
-            )
-            for image in images_data
+def get_png_bytes(*, image: PngImagePlugin.PngImageFile, png_profile: generator_config.PngProfile) -> bytes:
+    """
+    Get the bytes of a PNG image with an encoder profile.
+
+    If the image is small, or the profile tries a palette for any image, and the image fits in one, it's also encoded
+    with the palette, and that version is used when it's smaller. Flat icons usually are, without any pixel change.
+
+    Args:
+        image: a PIL image instance.
+        png_profile: the profile of the encoder.
+
+    Returns:
+        The bytes.
+    """
+    png_bytes = get_image_bytes(image=image, png_profile=png_profile)
+    palette_image = get_palette_image(image=image) if png_profile.palette or image.width * image.height <= PALETTE_MAX_PIXELS else None
+    if palette_image is None:
+        return png_bytes
+    palette_bytes = get_image_bytes(image=palette_image, png_profile=png_profile)
+    return palette_bytes if len(palette_bytes) < len(png_bytes) else png_bytes
+
+
+def render_image(*, image_data: ImageData, pyramid: Optional[Sequence[Image.Image]] = None) -> Tuple[bytes, ...]:
+    """
+    Resize an image, make it opaque if a background color is defined, and get its bytes in each of its formats.
+
+    The image is resized once, and the same pixels are encoded in each format. The PNG version uses the encoder profile
+    of the image, and a palette when it's smaller. It runs in the workers, so the palettes are tried in parallel too.
+
+    Args:
+        image_data: the data about the image to create.
+        pyramid: a downscale pyramid of the image source.
+
+    Returns:
+        The bytes of the PNG version, followed by the bytes in each of the other formats of the image.
+    """
+    if image_data.startup and image_data.image is not None:
+        image = get_startup_image(image=image_data.image, width=image_data.width, height=image_data.height, background_color=image_data.background_color, pyramid=pyramid)
+    else:
+        image = get_resized_image(image=image_data.image, width=image_data.width, height=image_data.height, pyramid=pyramid)
+        if image_data.background_color:
+            image = get_opaque_image(image=image, background_color=image_data.background_color)
+    png_bytes = get_png_bytes(image=image, png_profile=generator_config.PNG_PROFILES[image_data.png_profile])
+    return (png_bytes, *(get_image_bytes(image=image, image_format=image_format) for image_format in image_data.formats))
+
+
+def get_image_paths(*, image_data: ImageData) -> Tuple[pathlib.Path, ...]:
+    """
+    Get the paths of an image in each of its formats.
+
+    Args:
+        image_data: the data about the image to create.
+
+    Returns:
+        The path of the PNG version, followed by the path in each of the other formats of the image.
+    """
+    return (image_data.path, *(image_data.path.with_suffix(image_format.suffix) for image_format in image_data.formats))
+
+
+def get_image_job(*, image_data: ImageData) -> ImageJob:
+    """
+    Get the job that renders an image.
+
+    Args:
+        image_data: the data about the image to create.
+
+    Returns:
+        The job.
+    """
+    return ImageJob(
+        source_id=id(image_data.image),
+        width=image_data.width,
+        height=image_data.height,
+        background_color=image_data.background_color or None,
+        formats=image_data.formats,
+        startup=image_data.startup,
+        png_profile=image_data.png_profile,
+    )
+
+
+def plan_image_jobs(*, images_data: List[ImageData]) -> Dict[ImageJob, ImageData]:
+    """
+    Group a list of images by the job that renders them.
+
+    Args:
+        images_data: the data about the images to create.
+
+    Returns:
+        The unique jobs, each one with the data of the first image that needs it.
+    """
+    image_jobs: Dict[ImageJob, ImageData] = {}
+    for image_data in images_data:
+        image_jobs.setdefault(get_image_job(image_data=image_data), image_data)
+    return image_jobs
+
+
+def get_source_size(*, image_job: ImageJob) -> Tuple[int, int]:
+    """
+    Get the size to which the source of an image job is resized.
+
+    Args:
+        image_job: the job.
+
+    Returns:
+        The size.
+    """
+    if image_job.startup:
+        logo_size = get_startup_logo_size(width=image_job.width, height=image_job.height)
+        return logo_size, logo_size
+    return image_job.width, image_job.height
+
+
+def get_image_digest(*, image: Image.Image) -> str:
+    """
+    Get a hash of the content of an image source.
+
+    The images opened from a file are hashed from the file bytes, so they don't need to be decoded.
+
+    Args:
+        image: a PIL image instance.
+
+    Returns:
+        The hash.
+    """
+    filename = getattr(image, "filename", "")
+    data = pathlib.Path(filename).read_bytes() if filename else image.tobytes()
+    return hashlib.sha256(f"{image.format}:{image.mode}:{image.size}:".encode() + data).hexdigest()
+
+
+def get_cache_keys(*, image_job: ImageJob, source_digest: str) -> Tuple[str, ...]:
+    """
+    Get the cache keys of an image job, one for each of its formats.
+
+    They include everything that defines the image bytes: the source, the size, the background, the format and its
+    options or the PNG encoder profile, and the rendering and encoder versions.
+
+    Args:
+        image_job: the job.
+        source_digest: the hash of the job source.
+
+    Returns:
+        The key of the PNG version, followed by the key of each of the other formats of the job.
+    """
+    render_key = generator_cache.get_key(
+        RENDER_VERSION,
+        PIL.__version__,
+        source_digest,
+        image_job.width,
+        image_job.height,
+        image_job.background_color,
+        image_job.startup,
+    )
+    png_profile = generator_config.PNG_PROFILES[image_job.png_profile]
+    png_key = generator_cache.get_key(render_key, "PNG", png_profile.options, png_profile.palette)
+    return (png_key, *(generator_cache.get_key(render_key, image_format.name, image_format.options) for image_format in image_job.formats))
+
+
+def get_image_files(*, paths: Iterable[Tuple[pathlib.Path, ...]], images_bytes: Sequence[bytes]) -> Iterator[files.File]:
+    """
+    Get the files of the images rendered by a job.
+
+    Args:
+        paths: the paths of each image of the job in each of its formats.
+        images_bytes: the bytes of the job in each of its formats.
+
+    Yields:
+        The files.
+    """
+    for image_paths in paths:
+        yield from (files.File(path=path, data=image_bytes) for path, image_bytes in zip(image_paths, images_bytes))
+
+
+def render_images(*, images_data: List[ImageData], jobs: int = 1, cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None) -> Iterator[files.File]:
+    """
+    Render a list of images, using a pool of workers if more than one job is requested.
+
+    The images with the same source, size, background and encoder settings are rendered once and share their bytes.
+    Each image is resized once and encoded in each of its formats, and each version is yielded after the PNG one. If a
+    cache is defined, the images rendered in previous runs are read from it, and their sources aren't even decoded.
+    The cache is read and the other sources are decoded when this function is called, so a corrupt source is detected
+    before any file is yielded.
+    Each source is reduced once to a downscale pyramid, and each image is resized from the nearest larger level of it.
+    Pillow releases the GIL while it resizes and encodes, so the workers run in parallel across cores.
+    The images are yielded as soon as they are rendered, so only the ones in progress are held in memory. The output
+    keeps the order of the input, without repeated paths, and is the same as the one produced by a single job.
+
+    Args:
+        images_data: the data about the images to create.
+        jobs: the number of workers.
+        cache: the cache of rendered images.
+
+    Returns:
+        The images, which are rendered as they are consumed.
+
+    Raises:
+        WrongFileFormat: when a source that isn't cached can't be decoded.
+    """
+    image_jobs = plan_image_jobs(images_data=images_data)
+    jobs_paths: Dict[ImageJob, List[Tuple[pathlib.Path, ...]]] = {image_job: [] for image_job in image_jobs}
+    for image_data in {image_data.path: image_data for image_data in images_data}.values():
+        jobs_paths[get_image_job(image_data=image_data)].append(get_image_paths(image_data=image_data))
+
+    cache_keys: Dict[ImageJob, Tuple[str, ...]] = {}
+    cached_jobs: Dict[ImageJob, Tuple[Optional[bytes], ...]] = {}
+    pending_jobs: Dict[ImageJob, ImageData] = {}
+    source_digests: Dict[int, str] = {}
+    if cache is not None:
+        source_digests = {id(image_data.image): get_image_digest(image=image_data.image) for image_data in image_jobs.values() if image_data.image}
+    for image_job, image_data in image_jobs.items():
+        if cache is not None and image_job.source_id in source_digests:
+            cache_keys[image_job] = get_cache_keys(image_job=image_job, source_digest=source_digests[image_job.source_id])
+            cached_bytes = tuple(cache.get(key=cache_key) for cache_key in cache_keys[image_job])
+            if None not in cached_bytes:
+                cached_jobs[image_job] = cached_bytes
+                continue
+        pending_jobs[image_job] = image_data
+
+    # Build the pyramids before the workers share them, so the sources are decoded and reduced only once.
+    sources = {id(image_data.image): image_data.image for image_data in pending_jobs.values() if image_data.image}
+    for source in sources.values():
+        generator_config.decode_binary_image(image=source)
+    pyramids = {
+        source_id: get_image_pyramid(
+            image=source,
+            sizes=(get_source_size(image_job=image_job) for image_job in pending_jobs if image_job.source_id == source_id),
         )
+        for source_id, source in sources.items()
+    }
+
+    def render(image_data: ImageData) -> Tuple[bytes, ...]:
+        return render_image(image_data=image_data, pyramid=pyramids.get(id(image_data.image)))
+
+    def generate() -> Iterator[files.File]:
+        with contextlib.ExitStack() as exit_stack:
+            if jobs == 1 or len(pending_jobs) < 2:
+                jobs_bytes: Iterator[Tuple[bytes, ...]] = map(render, pending_jobs.values())
+            else:
+                executor = exit_stack.enter_context(futures.ThreadPoolExecutor(max_workers=jobs))
+                jobs_bytes = files.map_lazily(executor=executor, function=render, items=pending_jobs.values(), window=jobs)
+
+            # The pending jobs are rendered in the order of the plan, so the cached and the rendered images are yielded
+            # in the same order as without cache.
+            for image_job in image_jobs:
+                if image_job in cached_jobs:
+                    images_bytes = cached_jobs[image_job]
+                else:
+                    images_bytes = next(jobs_bytes)
+                    if cache is not None and image_job in cache_keys:
+                        for cache_key, image_bytes in zip(cache_keys[image_job], images_bytes):
+                            cache.set(key=cache_key, data=image_bytes)
+                yield from get_image_files(paths=jobs_paths[image_job], images_bytes=images_bytes)
+
+        if cache is not None:
+            cache.evict()
+
+    return generate()
+
+
+def get_output_paths(*, output: ImageOutput) -> Set[str]:
+    """
+    Get the paths of a resized image in each format in which it can be generated.
+
+    Args:
+        output: the resized image.
 
-        # Yandex.
-        image = ImageData(path=config["output_folder_path"] / "static" / "yandex.png", width=120, height=120)
-        resized_image = get_resized_image(image=config["favicon_png"], width=image.width, height=image.height)
-        if config.get("background_color"):
-            parsed_image = get_opaque_image(image=resized_image, background_color=str(config["background_color"]))
-        else:
-            parsed_image = resized_image
-        images.append(files.File(data=get_image_bytes(image=parsed_image), path=image.path))
-
-    if config["favicon_svg"]:
-        images.append(
-            files.File(
-                path=config["output_folder_path"] / "static" / "mask-icon.svg",
-                data=getattr(config["favicon_svg"], "read_bytes", bytes)(),
+    Returns:
+        The paths, relative to the output folder.
+    """
+    path = pathlib.PurePosixPath(output.path)
+    return {output.path, *(str(path.with_suffix(image_format.suffix)) for image_format in generator_config.get_modern_image_formats())}
+
+
+def get_images_dependencies() -> Tuple[files.Dependencies, ...]:
+    """
+    Get the inputs of each image that can be generated.
+
+    The images in modern formats are only included if Pillow can encode them.
+
+    Returns:
+        The dependencies of the images.
+    """
+    images_dependencies = [
+        files.Dependencies(path=path, keys=frozenset((source, "output_folder")), sources=frozenset((source,)), conditions=(frozenset((source,)),))
+        for source, path in COPIED_IMAGES.items()
+    ]
+    for output in RESIZED_IMAGES:
+        conditions = (frozenset((output.source,)), *output.conditions)
+        keys = frozenset(("output_folder", "background_color") if output.opaque or output.startup else ("output_folder",)).union(*conditions)
+        images_dependencies.append(files.Dependencies(path=output.path, keys=keys.union((PNG_PROFILE_KEY,)), sources=frozenset((output.source,)), conditions=conditions))
+        images_dependencies.extend(
+            files.Dependencies(
+                path=str(pathlib.PurePosixPath(output.path).with_suffix(image_format.suffix)),
+                keys=keys.union((MODERN_IMAGES_KEY,)),
+                sources=frozenset((output.source,)),
+                conditions=(*conditions, frozenset((MODERN_IMAGES_KEY,))),
             )
+            for image_format in generator_config.get_modern_image_formats()
         )
+    return tuple(images_dependencies)
+
 
-    if config.get("preview_png"):
-        images_data = (
-            # Open Graph.
-            ImageData(path=config["output_folder_path"] / "static" / "preview-600x600.png", width=600, height=600),
-            ImageData(path=config["output_folder_path"] / "static" / "preview-1080x1080.png", width=1080, height=1080),
-            # Twitter Cards.
-            ImageData(path=config["output_folder_path"] / "static" / "preview-600x600.png", width=600, height=600),
-            # JSON-LD.
-            ImageData(path=config["output_folder_path"] / "static" / "preview-600x600.png", width=600, height=600),
+def generate_images(
+    *,
+    config: generator_config.Config,
+    jobs: int = 1,
+    cache: Optional[Union[generator_cache.Cache, generator_cache.MemoryCache]] = None,
+    paths: Optional[Collection[str]] = None,
+) -> Iterator[files.File]:
+    """
+    Get the images ready to create.
+
+    Args:
+        config: the config.
+        jobs: the number of workers used to resize and encode the images. Must be greater than zero.
+        cache: the cache of rendered images.
+        paths: the paths, relative to the output folder, of the images to generate. All of them by default.
+
+    Yields:
+        The images, one at a time.
+    """
+    requested_paths = None if paths is None else set(paths)
+    images_data = [
+        ImageData(
+            path=config["output_folder_path"] / output.path,
+            width=output.width,
+            height=output.height,
+            image=config[output.source],
+            background_color=config.get("background_color") if output.opaque or output.startup else None,
+            formats=config.get("modern_images") or (),
+            startup=output.startup,
+            png_profile=config.get("png_profile") or generator_config.DEFAULT_PNG_PROFILE,
         )
-        images.extend(
-            files.File(
-                path=image.path,
-                data=get_image_bytes(image=get_resized_image(image=config["favicon_png"], width=image.width, height=image.height)),
-            )
-            for image in images_data
+        for output in RESIZED_IMAGES
+        if config.get(output.source)
+        and (requested_paths is None or get_output_paths(output=output) & requested_paths)
+        and files.check_conditions(conditions=output.conditions, config=config)
+    ]
+    copy_favicon_ico = bool(config.get("favicon_ico")) and (paths is None or COPIED_IMAGES["favicon_ico"] in paths)
+    if copy_favicon_ico:
+        generator_config.decode_binary_image(image=config["favicon_ico"])
+    # The sources are decoded before any image is yielded, so a corrupt one doesn't leave some of the files written.
+    resized_images = render_images(images_data=images_data, jobs=jobs, cache=cache)
+
+    if copy_favicon_ico:
+        # favicon ICO version, used by most browsers and OpenSearch.
+        yield files.File(
+            path=config["output_folder_path"] / COPIED_IMAGES["favicon_ico"],
+            data=get_image_bytes(image=config["favicon_ico"]),
+        )
+
+    if config.get("favicon_svg") and (paths is None or COPIED_IMAGES["favicon_svg"] in paths):
+        yield files.File(
+            path=config["output_folder_path"] / COPIED_IMAGES["favicon_svg"],
+            data=getattr(config["favicon_svg"], "read_bytes", bytes)(),
         )
 
-    return images
+    yield from resized_images
@@ -1,24 +1,23 @@
 """
 Handle jinja filters.
 """
-import base64
-import hashlib
+import jinja2
+from jinja2 import runtime
 
-from cushead.generator.templates import templates
 
-
-def generate_sri(path: str) -> str:
+@jinja2.pass_context
+def generate_sri(context: runtime.Context, path: str) -> str:
     """
-    Generate the SHA-512 Subresource Integrity of a file.
+    Get the SHA-512 Subresource Integrity of a template.
+
+    The template is rendered by the template loader of the context, so the integrity matches the file that is written,
+    and it's computed once however many times it's referenced.
 
     Args:
-        path: the template path, relative to the templates_folder instance attribute.
+        context: the context of the template that uses the filter.
+        path: the template path, relative to the templates folder.
 
     Returns:
         The Subresource Integrity.
     """
-    template_loader = templates.TemplateLoader()
-    data = template_loader.render_template(path=path)
-    digest = hashlib.new("sha512", data).digest()
-    base64_digest = base64.standard_b64encode(digest).decode("ascii")
-    return f"sha512-{base64_digest}"
+    return context["template_loader"].get_integrity(path=path)
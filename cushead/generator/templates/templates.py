@@ -3,50 +3,221 @@ Handle templates generation.
 """
 from __future__ import annotations
 
+import base64
+import functools
 import hashlib
 import pathlib
 import re
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Collection
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
 from typing import List
-from typing import Union
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
 
 import jinja2
+from jinja2 import nodes
 
-from cushead.generator import config as generator_config
 from cushead.generator import files
 from cushead.generator.templates.jinja import filters
 
+if TYPE_CHECKING:
+    from cushead.generator import config as generator_config
+
+# Folder of the jinja templates.
+TEMPLATES_FOLDER = pathlib.Path(__file__).parent / "jinja" / "templates"
+# Folder of the templates compiled into python modules, which is created when the package is built.
+COMPILED_TEMPLATES_FOLDER = pathlib.Path(__file__).parent / "jinja" / "compiled"
+# File of the compiled templates folder that stores the signature of the templates that were compiled.
+SIGNATURE_FILE_NAME = "signature"
+# The lines with only spaces, and the empty line at the end, which are removed from the rendered templates. It doesn't
+# capture groups nor nests repetitions, so it doesn't backtrack on each indented line.
+BLANK_LINES_PATTERN = re.compile("\n(?: +\n)+|\n\n$")
+# Minimum length of the rendered text that is normalized at once.
+NORMALIZATION_CHUNK_SIZE = 16 * 1024
+ENVIRONMENT_OPTIONS: Dict[str, Any] = {
+    "lstrip_blocks": True,
+    "autoescape": True,
+    "extensions": ["cushead.generator.templates.jinja.extensions.OneLineExtension"],
+}
+
+
+class TemplateOutput(NamedTuple):
+    """
+    Store data about a file rendered from a template.
+    """
+
+    template: str
+    # The file path, relative to the output folder.
+    path: str
+    # Groups of config keys. The file is generated if at least one key of each group is set.
+    conditions: Tuple[FrozenSet[str], ...] = ()
+
+
+class TemplateReferences(NamedTuple):
+    """
+    Store the inputs that a template reads directly.
+    """
+
+    keys: FrozenSet[str]
+    templates: FrozenSet[str]
+
+
+# The files rendered from the templates, in the order in which they are generated.
+TEMPLATES_OUTPUTS = (
+    TemplateOutput(template="index.jinja2", path="index.html"),
+    TemplateOutput(template="manifest.jinja2", path="manifest.json"),
+    TemplateOutput(template="robots.jinja2", path="robots.txt"),
+    TemplateOutput(template="sw.jinja2", path="sw.js"),
+    TemplateOutput(template="early_script.jinja2", path="static/early_script.js"),
+    TemplateOutput(template="late_script.jinja2", path="static/late_script.js"),
+    TemplateOutput(template="styles.jinja2", path="static/styles.css"),
+    TemplateOutput(template="sitemap.jinja2", path="sitemap.xml", conditions=(frozenset(("domain",)),)),
+    TemplateOutput(template="opensearch.jinja2", path="static/opensearch.xml", conditions=(frozenset(("domain",)), frozenset(("title",)))),
+    TemplateOutput(template="browserconfig.jinja2", path="static/browserconfig.xml", conditions=(frozenset(("favicon_png", "main_color")),)),
+    TemplateOutput(template="security.jinja2", path=".well-known/security", conditions=(frozenset(("author_email",)),)),
+    TemplateOutput(template="humans.jinja2", path="humans.txt", conditions=(frozenset(("author_name", "author_email")),)),
+)
+
+
+def get_templates_signature() -> str:
+    """
+    Get a signature of everything that defines the compiled templates.
+
+    It changes when a template, the environment options or the jinja version change.
+
+    Returns:
+        The signature.
+    """
+    signature = hashlib.sha256(repr((jinja2.__version__, ENVIRONMENT_OPTIONS)).encode())
+    for template_path in sorted(TEMPLATES_FOLDER.iterdir()):
+        signature.update(template_path.name.encode())
+        signature.update(template_path.read_bytes())
+    return signature.hexdigest()
+
+
+def compile_templates(*, path: pathlib.Path) -> None:
+    """
+    Compile the templates into python modules that can be loaded without parsing them again.
+
+    Args:
+        path: the destination folder.
+    """
+    environment = jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=str(TEMPLATES_FOLDER)), **ENVIRONMENT_OPTIONS)
+    environment.compile_templates(str(path), zip=None)
+    (path / SIGNATURE_FILE_NAME).write_text(get_templates_signature())
+
+
+@functools.lru_cache(maxsize=None)
+def get_environment() -> jinja2.Environment:
+    """
+    Get the jinja environment shared by all the template loaders of the process.
+
+    The templates are loaded from their compiled modules if they match the current templates. Otherwise they are parsed
+    from their sources, and their compiled code is kept in a bytecode cache that persists between runs. In both cases
+    the environment keeps each loaded template for the rest of the process.
+
+    Returns:
+        The environment.
+    """
+    try:
+        is_compiled = (COMPILED_TEMPLATES_FOLDER / SIGNATURE_FILE_NAME).read_text() == get_templates_signature()
+    except OSError:
+        is_compiled = False
+
+    if is_compiled:
+        environment = jinja2.Environment(loader=jinja2.ModuleLoader(str(COMPILED_TEMPLATES_FOLDER)), **ENVIRONMENT_OPTIONS)
+    else:
+        environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(searchpath=str(TEMPLATES_FOLDER)),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(),
+            **ENVIRONMENT_OPTIONS,
+        )
+    environment.filters["generate_sri"] = filters.generate_sri
+    return environment
+
 
 class TemplateLoader:
     """
     Handle jinja templates.
     """
 
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(self) -> None:
         """
         Initialize a jinja template loader.
+
+        The loader is available to the templates as template_loader, so the filters can use the templates that it
+        renders.
         """
-        template_loader = jinja2.FileSystemLoader(searchpath=str(pathlib.Path(__file__).parent / "jinja" / "templates"))
-        self.template_parser = jinja2.Environment(
-            loader=template_loader,
-            lstrip_blocks=True,
-            autoescape=True,
-            **kwargs,
-        )
+        self.template_parser = get_environment()
+        self.context: Dict[str, Any] = {"template_loader": self}
+        self.rendered_templates: Dict[str, bytes] = {}
+        self.integrities: Dict[str, str] = {}
 
     def render_template(self, *, path: str) -> bytes:
         """
         Render a template.
 
+        Each template is rendered once. The next calls return the same bytes.
+
         Args:
-            path: the template path, relative to the templates_folder instance attribute.
+            path: the template path, relative to the templates folder.
 
         Returns:
             The template rendered in UTF-8 format.
         """
-        rendered_template = self.template_parser.get_template(path).render()
-        cleaned_template = re.sub("((\n +)+\n)|(\n\n$)", "\n", rendered_template)
-        return cleaned_template.encode()
+        if path not in self.rendered_templates:
+            chunks = self.template_parser.get_template(path).generate(self.context)
+            self.rendered_templates[path] = b"".join(normalize_whitespaces(chunks=chunks))
+        return self.rendered_templates[path]
+
+    def get_integrity(self, *, path: str) -> str:
+        """
+        Get the Subresource Integrity of a template, computed once from the same bytes that are written for it.
+
+        Args:
+            path: the template path, relative to the templates folder.
+
+        Returns:
+            The Subresource Integrity.
+        """
+        if path not in self.integrities:
+            self.integrities[path] = get_subresource_integrity(data=self.render_template(path=path))
+        return self.integrities[path]
+
+
+def normalize_whitespaces(*, chunks: Iterable[str], chunk_size: int = NORMALIZATION_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Remove the blank lines of a template while it's rendered, and encode it in UTF-8.
+
+    A blank line match only has spaces and newlines, so the text rendered so far is normalized up to its last character
+    that isn't one of them, and the rest is kept for the next chunks. The result is the same as normalizing the whole
+    template at once, without keeping a copy of it.
+
+    Args:
+        chunks: the rendered chunks of the template.
+        chunk_size: the minimum length of the text that is normalized at once.
+
+    Yields:
+        The normalized chunks.
+    """
+    pending_chunks: List[str] = []
+    pending_size = 0
+    for chunk in chunks:
+        pending_chunks.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= chunk_size:
+            pending_text = "".join(pending_chunks)
+            end = len(pending_text.rstrip(" \n"))
+            yield BLANK_LINES_PATTERN.sub("\n", pending_text[:end]).encode()
+            pending_chunks = [pending_text[end:]]
+            pending_size = len(pending_chunks[0])
+    yield BLANK_LINES_PATTERN.sub("\n", "".join(pending_chunks)).encode()
 
 
 def get_template_hash(*, template: bytes) -> str:
@@ -62,91 +233,104 @@ def get_template_hash(*, template: bytes) -> str:
     return hashlib.sha256(template).hexdigest()[0:6]
 
 
-def generate_templates(*, config: generator_config.Config) -> List[files.File]:
+def get_subresource_integrity(*, data: bytes) -> str:
     """
-    Get templates ready to create.
+    Get the SHA-512 Subresource Integrity of some data.
 
     Args:
-        config: the config used in the templates context.
+        data: the data.
 
     Returns:
-        The templates.
+        The Subresource Integrity.
     """
-    template_loader = TemplateLoader(extensions=["cushead.generator.templates.jinja.extensions.OneLineExtension"])
-    template_loader.template_parser.globals["config"] = config
-    template_loader.template_parser.filters["generate_sri"] = filters.generate_sri
-    index_template = template_loader.render_template(path="index.jinja2")
-    index_hash = get_template_hash(template=index_template)
-    template_loader.template_parser.globals["index_hash"] = index_hash
-
-    templates = [
-        files.File(
-            path=config["output_folder_path"] / "index.html",
-            data=index_template,
-        ),
-        files.File(
-            path=config["output_folder_path"] / "manifest.json",
-            data=template_loader.render_template(path="manifest.jinja2"),
-        ),
-        files.File(
-            path=config["output_folder_path"] / "robots.txt",
-            data=template_loader.render_template(path="robots.jinja2"),
-        ),
-        files.File(
-            path=config["output_folder_path"] / "sw.js",
-            data=template_loader.render_template(path="sw.jinja2"),
-        ),
-        files.File(
-            path=config["output_folder_path"] / "static" / "early_script.js",
-            data=template_loader.render_template(path="early_script.jinja2"),
-        ),
-        files.File(
-            path=config["output_folder_path"] / "static" / "late_script.js",
-            data=template_loader.render_template(path="late_script.jinja2"),
-        ),
-        files.File(
-            path=config["output_folder_path"] / "static" / "styles.css",
-            data=template_loader.render_template(path="styles.jinja2"),
-        ),
-    ]
-
-    if config.get("domain"):
-        templates.append(
-            files.File(
-                path=config["output_folder_path"] / "sitemap.xml",
-                data=template_loader.render_template(path="sitemap.jinja2"),
-            ),
-        )
-        if config.get("title"):
-            templates.append(
-                files.File(
-                    path=config["output_folder_path"] / "static" / "opensearch.xml",
-                    data=template_loader.render_template(path="opensearch.jinja2"),
-                ),
-            )
-
-    if config.get("favicon_png") or config.get("main_color"):
-        templates.append(
-            files.File(
-                path=config["output_folder_path"] / "static" / "browserconfig.xml",
-                data=template_loader.render_template(path="browserconfig.jinja2"),
-            )
-        )
+    digest = hashlib.sha512(data).digest()
+    base64_digest = base64.standard_b64encode(digest).decode("ascii")
+    return f"sha512-{base64_digest}"
 
-    if config.get("author_email"):
-        templates.append(
-            files.File(
-                path=config["output_folder_path"] / ".well-known" / "security",
-                data=template_loader.render_template(path="security.jinja2"),
-            )
-        )
 
-    if config.get("author_name") or config.get("author_email"):
-        templates.append(
-            files.File(
-                path=config["output_folder_path"] / "humans.txt",
-                data=template_loader.render_template(path="humans.jinja2"),
-            )
+@functools.lru_cache(maxsize=None)
+def get_template_references(*, path: str) -> TemplateReferences:
+    """
+    Get the config keys and the other templates that a template reads, from its syntax tree.
+
+    The keys are read as config.key or config["key"]. The other templates are read through the generate_sri filter, and
+    through the index_hash variable, which is the hash of the index template.
+
+    Args:
+        path: the template path, relative to the templates folder.
+
+    Returns:
+        The references of the template.
+    """
+    template_tree = get_environment().parse((TEMPLATES_FOLDER / path).read_text())
+    keys = set()
+    for node in template_tree.find_all((nodes.Getattr, nodes.Getitem)):
+        if isinstance(node.node, nodes.Name) and node.node.name == "config":
+            if isinstance(node, nodes.Getattr):
+                keys.add(node.attr)
+            elif isinstance(node.arg, nodes.Const):
+                keys.add(node.arg.value)
+
+    templates = {node.node.value for node in template_tree.find_all(nodes.Filter) if node.name == "generate_sri" and isinstance(node.node, nodes.Const)}
+    if any(node.name == "index_hash" for node in template_tree.find_all(nodes.Name)):
+        templates.add("index.jinja2")
+    return TemplateReferences(keys=frozenset(keys), templates=frozenset(templates))
+
+
+def get_template_keys(*, path: str) -> FrozenSet[str]:
+    """
+    Get the config keys that a template reads, directly or through the other templates that it reads.
+
+    Args:
+        path: the template path, relative to the templates folder.
+
+    Returns:
+        The config keys.
+    """
+    references = get_template_references(path=path)
+    return references.keys.union(*(get_template_keys(path=template) for template in references.templates))
+
+
+def get_templates_dependencies() -> Tuple[files.Dependencies, ...]:
+    """
+    Get the inputs of each file that can be rendered from the templates.
+
+    Returns:
+        The dependencies of the files.
+    """
+    return tuple(
+        files.Dependencies(
+            path=output.path,
+            keys=get_template_keys(path=output.template).union({"output_folder"}, *output.conditions),
+            sources=frozenset(),
+            conditions=output.conditions,
         )
+        for output in TEMPLATES_OUTPUTS
+    )
+
 
-    return templates
+def generate_templates(*, config: generator_config.Config, paths: Optional[Collection[str]] = None) -> Iterator[files.File]:
+    """
+    Get templates ready to create.
+
+    Args:
+        config: the config used in the templates context.
+        paths: the paths, relative to the output folder, of the templates to generate. All of them by default.
+
+    Yields:
+        The templates, one at a time.
+    """
+    outputs = [output for output in TEMPLATES_OUTPUTS if (paths is None or output.path in paths) and files.check_conditions(conditions=output.conditions, config=config)]
+    if not outputs:
+        return
+
+    template_loader = TemplateLoader()
+    template_loader.context["config"] = config
+    index_template = template_loader.render_template(path="index.jinja2")
+    template_loader.context["index_hash"] = get_template_hash(template=index_template)
+
+    for output in outputs:
+        yield files.File(
+            path=config["output_folder_path"] / output.path,
+            data=template_loader.render_template(path=output.template),
+        )
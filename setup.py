@@ -5,10 +5,32 @@ Host the setup function.
 import pathlib
 
 import setuptools
+from setuptools.command import build_py
 
 from cushead import info
 
 
+class BuildPy(build_py.build_py):
+    """
+    Build the package and compile its templates into python modules.
+    """
+
+    def run(self) -> None:
+        """
+        Execute the build.
+
+        The templates are loaded from their sources when they can't be compiled, so a failure doesn't stop the build.
+        """
+        super().run()
+        try:
+            from cushead.generator.templates import templates  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return
+        compiled_templates_path = pathlib.Path(self.build_lib) / info.PACKAGE_NAME / "generator" / "templates" / "jinja" / "compiled"
+        compiled_templates_path.mkdir(parents=True, exist_ok=True)
+        templates.compile_templates(path=compiled_templates_path)
+
+
 def setup() -> None:
     """
     Execute the setup.
@@ -19,6 +41,7 @@ def setup() -> None:
     setuptools.setup(
         name=info.PACKAGE_NAME,
         version=info.PACKAGE_VERSION,
+        cmdclass={"build_py": BuildPy},
         entry_points={"console_scripts": [f"{info.PACKAGE_NAME}={info.PACKAGE_NAME}.console.console:main"]},
         url=info.SOURCE,
         project_urls={
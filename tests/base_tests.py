@@ -90,6 +90,12 @@ class BaseTests(unittest.TestCase):
         """
         shutil.rmtree(self.config_folder.absolute())
 
+    def remove_output_folder_content(self) -> None:
+        """
+        Remove the files generated by a config, keeping the config file and its images.
+        """
+        shutil.rmtree(self.output_folder.absolute())
+
     def setUp(self) -> None:
         """
         Create the default configuration file with images and set the default config in the config instance attribute.
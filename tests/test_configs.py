@@ -2,9 +2,21 @@
 """
 Test different configs.
 """
+import gzip
+import io
+import json
+import os
 import pathlib
+import shutil
+import subprocess
+import sys
 import unittest
 
+from PIL import Image
+
+from cushead.console.arguments import config
+from cushead.console.arguments import setup
+from cushead.generator import config as generator_config
 from tests import base_tests
 
 
@@ -45,6 +57,211 @@ class TestConfig(base_tests.BaseTests):
         self.execute_cli(args=["-c", str(self.config_file)])
         self.compare_output(template_folder_path=pathlib.Path("default_config"))
 
+    def test_jobs(self) -> None:
+        """
+        Test that generating the images with multiple workers produces the same output.
+        """
+        self.execute_cli(args=["-c", "-j", "4", str(self.config_file)])
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_cache_dir(self) -> None:
+        """
+        Test that the images cached in a previous run produce the same output.
+        """
+        cache_dir = self.config_folder / "cache"
+        self.execute_cli(args=["-c", "--cache-dir", str(cache_dir), str(self.config_file)])
+        cached_files = sorted(cache_dir.iterdir())
+        self.assertTrue(cached_files)
+
+        self.remove_output_folder_content()
+        self.execute_cli(args=["-c", "--cache-dir", str(cache_dir), str(self.config_file)])
+        self.assertEqual(sorted(cache_dir.iterdir()), cached_files)
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_incremental(self) -> None:
+        """
+        Test that the incremental mode only writes the files that changed.
+        """
+        self.execute_cli(args=["-c", str(self.config_file)])
+        for file in self.output_folder.rglob("*"):
+            os.utime(file, (0, 0))
+        changed_file = self.output_folder / "index.html"
+        changed_file.write_text("changed")
+
+        self.execute_cli(args=["-c", "--incremental", str(self.config_file)])
+        self.assertNotEqual(changed_file.stat().st_mtime, 0)
+        for file in self.output_folder.rglob("*"):
+            if file.is_file() and file != changed_file:
+                self.assertEqual(file.stat().st_mtime, 0)
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_batch(self) -> None:
+        """
+        Test that building several configs at once produces the same output as building each one.
+        """
+        site_folder = self.config_folder / "site"
+        shutil.copytree(self.config_folder, site_folder)
+        self.execute_cli(args=["-c", str(self.config_folder / "**" / "config.json")])
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+        self.output_folder = site_folder / "output"
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_batch_jobs(self) -> None:
+        """
+        Test that building several configs in parallel processes produces the same output as building each one.
+        """
+        for key in self.config:
+            if key != "static_url":
+                self.config[key] = None
+        self.write_config_file()
+        site_folder = self.config_folder / "site"
+        site_folder.mkdir()
+        shutil.copy(self.config_file, site_folder)
+        self.execute_cli(args=["-c", "-j", "2", str(self.config_folder), str(site_folder)])
+        self.compare_output(template_folder_path=pathlib.Path("null_values"))
+        self.output_folder = site_folder / "output"
+        self.compare_output(template_folder_path=pathlib.Path("null_values"))
+
+    def test_json_lines(self) -> None:
+        """
+        Test that each config of a JSON lines file produces the same output as a config file.
+        """
+        for key in self.config:
+            if key != "static_url":
+                self.config[key] = None
+        json_lines_file = self.config_folder / "sites.jsonl"
+        json_lines_file.write_text("\n".join((json.dumps(self.config), "", json.dumps({**self.config, "output_folder": "site"}))))
+        self.execute_cli(args=["-c", "-j", "2", str(json_lines_file)])
+        self.output_folder = self.config_folder / "output" / "1"
+        self.compare_output(template_folder_path=pathlib.Path("null_values"))
+        self.output_folder = self.config_folder / "site"
+        self.compare_output(template_folder_path=pathlib.Path("null_values"))
+
+    def test_archive(self) -> None:
+        """
+        Test that the archived files are the same that the config generates, and that the archives are reproducible.
+        """
+        for key in self.config:
+            if key != "static_url":
+                self.config[key] = None
+        self.write_config_file()
+        for archive_name in ("site.tar.gz", "site.zip"):
+            archive_file = self.config_folder / archive_name
+            self.execute_cli(args=["-c", "--archive", str(archive_file), str(self.config_file)])
+            self.assertFalse(self.output_folder.exists())
+            archive_data = archive_file.read_bytes()
+            self.execute_cli(args=["-c", "--archive", str(archive_file), str(self.config_file)])
+            self.assertEqual(archive_file.read_bytes(), archive_data)
+
+            shutil.unpack_archive(archive_file, self.output_folder)
+            self.compare_output(template_folder_path=pathlib.Path("null_values"))
+            self.remove_output_folder_content()
+
+        # The tar archive written to the standard output doesn't have any message.
+        archive_file = self.config_folder / "site.tar"
+        self.execute_cli(args=["-c", "--archive", str(archive_file), str(self.config_file)])
+        code = f"from cushead.console import console; console.init(args={['-c', '--archive', '-', str(self.config_file)]!r})"
+        process = subprocess.run([sys.executable, "-c", code], cwd=self.base_folder.parent, capture_output=True, check=True)
+        self.assertEqual(process.stdout, archive_file.read_bytes())
+
+    def test_compress(self) -> None:
+        """
+        Test that the text files have a gzip version with the same content when it's smaller, and the images don't.
+        """
+        self.execute_cli(args=["-c", "--compress", str(self.config_file)])
+        compressed_files = {file.with_suffix("") for file in self.output_folder.rglob("*.gz")}
+        self.assertIn(self.output_folder / "index.html", compressed_files)
+        for file in self.output_folder.rglob("*"):
+            if file.suffix == ".gz":
+                self.assertEqual(gzip.decompress(file.read_bytes()), file.with_suffix("").read_bytes())
+                self.assertLess(file.stat().st_size, file.with_suffix("").stat().st_size)
+            elif file.suffix in (".png", ".ico"):
+                self.assertNotIn(file, compressed_files)
+
+        # The versions written by previous builds that aren't generated anymore are removed, so they aren't served.
+        stale_files = [file for file in (self.output_folder / "humans.txt.gz", self.output_folder / "index.html.br") if not file.exists()]
+        for file in stale_files:
+            file.write_bytes(b"stale")
+        self.execute_cli(args=["-c", "--compress", str(self.config_file)])
+        self.assertIn(self.output_folder / "humans.txt.gz", stale_files)
+        for file in stale_files:
+            self.assertFalse(file.exists())
+
+        # The same files are generated without the compressed versions.
+        for file in compressed_files:
+            file.with_name(f"{file.name}.gz").unlink()
+            file.with_name(f"{file.name}.br").unlink(missing_ok=True)
+        self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_modern_images(self) -> None:
+        """
+        Test that each resized image has a version in each modern format that Pillow can encode.
+        """
+        self.config["modern_images"] = True
+        self.write_config_file()
+        self.execute_cli(args=["-c", str(self.config_file)])
+        image_formats = generator_config.get_modern_image_formats()
+        for png_file in self.output_folder.rglob("*.png"):
+            for image_format in image_formats:
+                with Image.open(png_file.with_suffix(image_format.suffix)) as modern_image:
+                    self.assertEqual(modern_image.format, image_format.name)
+        if not image_formats:
+            self.compare_output(template_folder_path=pathlib.Path("default_config"))
+
+    def test_palette_source(self) -> None:
+        """
+        Test a favicon PNG with a palette, which is resized like an RGBA one.
+        """
+        favicon_path = self.config_folder / self.config["favicon_png"]
+        with Image.open(favicon_path) as favicon:
+            favicon.convert("RGBA").quantize(colors=64).save(favicon_path)
+        self.execute_cli(args=["-c", str(self.config_file)])
+        expected_folder = self.base_folder / "templates" / "default_config"
+        for expected_file in expected_folder.rglob("*.png"):
+            with Image.open(self.output_folder / expected_file.relative_to(expected_folder)) as image, Image.open(expected_file) as expected_image:
+                self.assertEqual(image.size, expected_image.size)
+                self.assertIsNotNone(image.convert("RGBA").getchannel("A").getbbox())
+
+    def test_png_profiles(self) -> None:
+        """
+        Test that each PNG encoder profile produces the same pixels, and that the CLI overrides the profile of the config.
+        """
+        for png_profile in generator_config.PNG_PROFILES:
+            self.assertEqual(setup.get_parser().parse_args(["-c", "--png-profile", png_profile, "config.json"]).png_profile, png_profile)
+
+        self.execute_cli(args=["-c", str(self.config_file)])
+        balanced_files = {file.relative_to(self.output_folder): file.read_bytes() for file in self.output_folder.rglob("*.png")}
+        self.config["png_profile"] = "fast"
+        self.write_config_file()
+        sizes = {}
+        for png_profile, args in (("fast", ["-c"]), ("smallest", ["-c", "--png-profile", "smallest"])):
+            shutil.rmtree(self.output_folder)
+            self.execute_cli(args=[*args, str(self.config_file)])
+            sizes[png_profile] = 0
+            for path, balanced_bytes in balanced_files.items():
+                sizes[png_profile] += (self.output_folder / path).stat().st_size
+                with Image.open(self.output_folder / path) as image, Image.open(io.BytesIO(balanced_bytes)) as balanced_image:
+                    self.assertEqual(image.convert("RGBA").tobytes(), balanced_image.convert("RGBA").tobytes())
+        self.assertGreater(sizes["fast"], sum(map(len, balanced_files.values())))
+        self.assertLess(sizes["smallest"], sum(map(len, balanced_files.values())))
+
+    def test_explain(self) -> None:
+        """
+        Test that the explained files are the ones that each config generates, and that they aren't generated.
+        """
+        self.execute_cli(args=["-c", "--explain", str(self.config_file)])
+        self.assertFalse(self.output_folder.exists())
+
+        for template_folder_path, config_data in (
+            ("default_config", self.config),
+            ("null_values", {key: value if key == "static_url" else None for key, value in self.config.items()}),
+        ):
+            template_folder = self.base_folder / "templates" / template_folder_path
+            self.assertEqual(
+                {dependencies.path for dependencies in config.explain_config(config=config_data)},
+                {file.relative_to(template_folder).as_posix() for file in template_folder.rglob("*") if file.is_file()},
+            )
+
     def test_missing_keys(self) -> None:
         """
         Test a config without any non-required field.
@@ -27,6 +27,19 @@ class TestArgs(base_tests.BaseTests):
 
         # Pass optional argument without a required ones.
         self.execute_cli(args=["-c", "-i"], expected_exception="Can't use -i argument without --default.")
+        self.execute_cli(args=["-d", "-j", "2"], expected_exception="Can't use -j argument without --config.")
+        self.execute_cli(args=["-d", "--cache-dir", "cache"], expected_exception="Can't use --cache-dir argument without --config.")
+        self.execute_cli(args=["-d", "--watch", "config.json"], expected_exception="Can't use --watch argument without --config.")
+        self.execute_cli(args=["-d", "--explain", "config.json"], expected_exception="Can't use --explain argument without --config.")
+        self.execute_cli(args=["-c", "--watch", "--explain", "config.json"], expected_exception="Can't use --watch and --explain arguments together.")
+        self.execute_cli(args=["-d", "--compress", "config.json"], expected_exception="Can't use --compress argument without --config.")
+        self.execute_cli(args=["-d", "--png-profile", "fast", "config.json"], expected_exception="Can't use --png-profile argument without --config.")
+        self.execute_cli(args=["-d", "--archive", "site.zip", "config.json"], expected_exception="Can't use --archive argument without --config.")
+        self.execute_cli(args=["-c", "--archive", "site.zip", "--incremental", "config.json"], expected_exception="Can't use --archive and --incremental arguments together.")
+        self.execute_cli(args=["-d", "a.json", "b.json"], expected_exception="Can't use more than one FILE with -d.")
+
+        # Invalid argument values.
+        self.execute_cli(args=["-c", "--jobs", "0"], expected_exception="The --jobs argument must be greater than zero.")
 
         # Miss the file.
         self.execute_cli(args=["-c"], expected_exception="The path to the config file is missing.")
@@ -122,15 +135,65 @@ class TestReferences(base_tests.BaseTests):
 
     def test_config_reference_is_directory(self) -> None:
         """
-        The reference is a directory but a file is expected.
+        The reference is a directory without config files.
         """
+        reference = self.config_folder / "empty"
+        reference.mkdir()
         expected_exception = "\n".join(
             (
-                f"The file ({self.config_folder}) must be a reference to a file.",
-                f"ABSOLUTE PATH: {self.config_folder.absolute()}",
+                f"The folder ({reference}) doesn't have config files.",
+                f"ABSOLUTE PATH: {reference.absolute()}",
+            ),
+        )
+        self.execute_cli(args=["-c", str(reference)], expected_exception=expected_exception)
+
+    def test_config_pattern_does_not_match(self) -> None:
+        """
+        The reference is a glob pattern that doesn't match any file.
+        """
+        reference = self.config_folder / "*.yaml"
+        self.execute_cli(args=["-c", str(reference)], expected_exception=f"The pattern ({reference}) doesn't match any file.")
+
+    def test_batch_failure(self) -> None:
+        """
+        Some of the configs can't be built.
+        """
+        self.config_file.write_text("invalid file format")
+        invalid_config_file = self.config_folder / "invalid.json"
+        invalid_config_file.write_text("{}")
+        self.execute_cli(args=["-c", str(self.config_file), str(invalid_config_file)], expected_exception="2 of 2 sites can't be built.")
+
+        # A line of a JSON lines file that isn't valid JSON fails like a config file.
+        invalid_config_lines_file = self.config_folder / "invalid.jsonl"
+        invalid_config_lines_file.write_text("invalid line format")
+        self.execute_cli(args=["-c", str(self.config_file), str(invalid_config_lines_file)], expected_exception="2 of 2 sites can't be built.")
+
+    def test_watch_several_configs(self) -> None:
+        """
+        The watch mode is used with a JSON lines file.
+        """
+        config_lines_file = self.config_folder / "sites.jsonl"
+        config_lines_file.write_text("{}")
+        self.execute_cli(args=["-c", "--watch", str(config_lines_file)], expected_exception="Can't use --watch argument with several configs.")
+
+    def test_archive_format(self) -> None:
+        """
+        The archive format isn't supported.
+        """
+        expected_exception = "The --archive argument must end with .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz or .zip, or be - to use the standard output."
+        self.execute_cli(args=["-c", "--archive", "site.rar", str(self.config_file)], expected_exception=expected_exception)
+
+    def test_cache_dir_is_file(self) -> None:
+        """
+        The cache folder reference is a file.
+        """
+        expected_exception = "\n".join(
+            (
+                f"The cache folder ({self.config_file}) must be a reference to a directory.",
+                f"ABSOLUTE PATH: {self.config_file.absolute()}",
             ),
         )
-        self.execute_cli(args=["-c", str(self.config_folder)], expected_exception=expected_exception)
+        self.execute_cli(args=["-c", "--cache-dir", str(self.config_file), str(self.config_file)], expected_exception=expected_exception)
 
     def test_invalid_format(self) -> None:
         """
@@ -204,6 +267,44 @@ class TestReferences(base_tests.BaseTests):
         )
         self.execute_cli(args=["-c", str(self.config_file)], expected_exception=expected_exception)
 
+    def test_image_is_truncated(self) -> None:
+        """
+        The image can be identified, but its pixels can't be decoded, which is detected before any file is written.
+        """
+        reference = self.config_folder / "favicon_png_2688px.png"
+        reference.write_bytes(reference.read_bytes()[:20000])
+        expected_exception = "\n".join(
+            (
+                f"Can't decode the image ({reference}).",
+                f"ABSOLUTE PATH: {reference.absolute()}",
+                "Exception: image file is truncated",
+            ),
+        )
+        self.execute_cli(args=["-c", str(self.config_file)], expected_exception=expected_exception)
+        # The sources are decoded before any file is written.
+        self.assertFalse(self.output_folder.exists())
+
+    def test_archive_is_kept(self) -> None:
+        """
+        The archive of a build that fails doesn't replace the previous one.
+        """
+        archive_file = self.config_folder / "site.zip"
+        self.execute_cli(args=["-c", "--archive", str(archive_file), str(self.config_file)])
+        archive_data = archive_file.read_bytes()
+
+        reference = self.config_folder / "favicon_png_2688px.png"
+        reference.write_bytes(reference.read_bytes()[:20000])
+        expected_exception = "\n".join(
+            (
+                f"Can't decode the image ({reference}).",
+                f"ABSOLUTE PATH: {reference.absolute()}",
+                "Exception: image file is truncated",
+            ),
+        )
+        self.execute_cli(args=["-c", "--archive", str(archive_file), str(self.config_file)], expected_exception=expected_exception)
+        self.assertEqual(archive_file.read_bytes(), archive_data)
+        self.assertEqual(sorted(path.name for path in self.config_folder.glob(".*.tmp")), [])
+
 
 class TestFileCreation(base_tests.BaseTests):
     """
@@ -2,9 +2,39 @@
 """
 Test functions that can't be tested with the other tests.
 """
+import asyncio
+import contextlib
+import io
+import os
+import pathlib
+import random
+import re
+import subprocess
+import sys
 import unittest
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from unittest.mock import patch
 
+import jinja2
+from PIL import Image
+
+from cushead import api
+from cushead import asgi
+from cushead.console.arguments import batch
+from cushead.console.arguments import config
+from cushead.console.arguments import files_creator
+from cushead.console.arguments import watch
+from cushead.console.assets import assets
+from cushead.generator import cache
+from cushead.generator import config as generator_config
+from cushead.generator import files
+from cushead.generator import image_ops
 from cushead.generator import images
+from cushead.generator.templates import templates
 from tests import base_tests
 
 
@@ -21,6 +51,270 @@ class TestPackages(base_tests.BaseTests):
         self.assertIsNone(images.get_opaque_image(image=None, background_color=""))
         self.assertEqual(images.get_image_bytes(image=None), b"")
 
+        image = Image.new("RGBA", (64, 64))
+        pyramid = images.get_image_pyramid(image=image, sizes=((8, 8), (32, 16)))
+        self.assertEqual([level.size for level in pyramid], [(64, 64), (32, 32), (16, 16)])
+        self.assertEqual(images.get_pyramid_level(pyramid=pyramid, width=8, height=8).size, (16, 16))
+        self.assertEqual(images.get_resized_image(image=image, width=32, height=16, pyramid=pyramid).size, (32, 16))
+
+        image.format = "PNG"
+        images_data = [
+            images.ImageData(path=pathlib.Path("a.png"), width=16, height=16, image=image),
+            images.ImageData(path=pathlib.Path("b.png"), width=16, height=16, image=image, background_color=""),
+            images.ImageData(path=pathlib.Path("c.png"), width=16, height=16, image=image, background_color="#ffffff"),
+            images.ImageData(path=pathlib.Path("a.png"), width=16, height=16, image=image),
+        ]
+        self.assertEqual([image_data.path.name for image_data in images.plan_image_jobs(images_data=images_data).values()], ["a.png", "c.png"])
+        rendered_images = list(images.render_images(images_data=images_data))
+        self.assertEqual([rendered_image.path.name for rendered_image in rendered_images], ["a.png", "b.png", "c.png"])
+        self.assertIs(rendered_images[0].data, rendered_images[1].data)
+
+        # With a partly warm cache, the cached and the rendered images keep the order of the input.
+        images_data = [images.ImageData(path=pathlib.Path(f"{name}.png"), width=size, height=size, image=image) for name, size in (("a", 8), ("b", 16), ("c", 32))]
+        images_cache = cache.MemoryCache()
+        list(images.render_images(images_data=images_data[1:2], cache=images_cache))
+        for jobs in (1, 2):
+            rendered_images = list(images.render_images(images_data=images_data, jobs=jobs, cache=images_cache))
+            self.assertEqual([rendered_image.path.name for rendered_image in rendered_images], ["a.png", "b.png", "c.png"])
+            self.assertEqual(rendered_images, list(images.render_images(images_data=images_data)))
+
+        # The startup screens only resize the image to the size of the logo, which is centered over the canvas.
+        logo = Image.new("RGBA", (64, 64), (255, 0, 0, 255))
+        startup_image = images.get_startup_image(image=logo, width=100, height=50, background_color="#0000ff")
+        self.assertEqual((startup_image.mode, startup_image.size), ("RGB", (100, 50)))
+        self.assertEqual(startup_image.getpixel((0, 0)), (0, 0, 255))
+        self.assertEqual(startup_image.getpixel((50, 25)), (255, 0, 0))
+        self.assertEqual(images.get_startup_image(image=logo, width=100, height=50).getbbox(), (40, 15, 60, 35))
+
+        # The other formats are encoded from the same pixels, and yielded after the PNG version.
+        image_format = generator_config.ImageFormat(name="TIFF", suffix=".tiff", mime_type="image/tiff", options=())
+        images_data = [images.ImageData(path=pathlib.Path("a.png"), width=16, height=16, image=image, formats=(image_format,))]
+        rendered_images = list(images.render_images(images_data=images_data))
+        self.assertEqual([rendered_image.path.name for rendered_image in rendered_images], ["a.png", "a.tiff"])
+        with Image.open(io.BytesIO(rendered_images[0].data)) as png_image, Image.open(io.BytesIO(rendered_images[1].data)) as tiff_image:
+            self.assertEqual(tiff_image.format, "TIFF")
+            self.assertEqual(png_image.tobytes(), tiff_image.tobytes())
+
+        # The images with few colors are encoded with a palette, with the alpha of the translucent colors in tRNS.
+        flat_image = Image.new("RGBA", (64, 64), (255, 0, 0, 255))
+        flat_image.paste((0, 0, 255, 128), (0, 0, 32, 64))
+        flat_image.paste((0, 0, 0, 0), (0, 0, 16, 64))
+        flat_image.format = "PNG"
+        self.assertEqual(images.get_palette_image(image=flat_image).info["transparency"], bytes((0, 128)))
+        self.assertIsNone(images.get_palette_image(image=Image.frombytes("RGB", (257, 1), b"".join(color.to_bytes(3, "big") for color in range(257)))))
+        for png_profile in generator_config.PNG_PROFILES.values():
+            with Image.open(io.BytesIO(images.get_png_bytes(image=flat_image, png_profile=png_profile))) as png_image:
+                self.assertEqual(png_image.mode, "P")
+                self.assertEqual(png_image.convert("RGBA").tobytes(), flat_image.tobytes())
+
+    def test_cushead_generator_image_ops(self) -> None:
+        """
+        Test functions of 'cushead.generator.image_ops'.
+        """
+        randomizer = random.Random(0)
+        test_images = [Image.frombytes("RGBA", size, bytes(randomizer.getrandbits(8) for _ in range(size[0] * size[1] * 4))) for size in ((8, 8), (6, 3), (8, 8))]
+        self.assertEqual([image.size for image in image_ops.contain(images=test_images, width=8, height=4)], [(8, 4)] * 3)
+        transparent_image = Image.new("RGBA", (2, 1))
+        transparent_image.putpixel((1, 0), (255, 0, 0, 255))
+        self.assertEqual(list(image_ops.flatten_alpha(images=(transparent_image,), color="#102030", use_numpy=False)[0].getdata()), [(16, 32, 48, 255), (255, 0, 0, 255)])
+        self.assertEqual(image_ops.pad_to_canvas(images=test_images[1:2], width=8, height=5, use_numpy=False)[0].getbbox(), (1, 1, 7, 4))
+
+        # NumPy produces the same pixels as Pillow.
+        if image_ops.get_numpy() is not None:
+            for operation in (
+                lambda use_numpy: image_ops.flatten_alpha(images=test_images, color="#102030", use_numpy=use_numpy),
+                lambda use_numpy: image_ops.pad_to_canvas(images=test_images, width=9, height=9, use_numpy=use_numpy),
+                lambda use_numpy: image_ops.pad_to_canvas(images=test_images, width=9, height=9, color="#102030", use_numpy=use_numpy),
+                lambda use_numpy: image_ops.contain(images=test_images, width=8, height=4, use_numpy=use_numpy),
+            ):
+                self.assertEqual([image.tobytes() for image in operation(True)], [image.tobytes() for image in operation(False)])
+
+    def test_cushead_generator_cache(self) -> None:
+        """
+        Test functions of 'cushead.generator.cache'.
+        """
+        files_cache = cache.Cache(path=self.config_folder / "cache", max_size=8)
+        self.assertIsNone(files_cache.get(key="a"))
+        for timestamp, key in enumerate(("a", "b", "c")):
+            files_cache.set(key=key, data=b"1234")
+            os.utime(files_cache.path / key, (timestamp, timestamp))
+        self.assertEqual(files_cache.get(key="a"), b"1234")
+
+        # The least recently used entry is removed.
+        files_cache.evict()
+        self.assertEqual(sorted(file.name for file in files_cache.path.iterdir()), ["a", "c"])
+
+        # The memory cache drops the least recently used entries, and reads the folder cache when they are requested.
+        memory_cache = cache.MemoryCache(max_size=8, cache=files_cache)
+        memory_cache.set(key="d", data=b"1234")
+        memory_cache.set(key="e", data=b"1234")
+        self.assertEqual(memory_cache.get(key="d"), b"1234")
+        memory_cache.set(key="f", data=b"1234")
+        self.assertEqual(list(memory_cache.entries), ["d", "f"])
+        self.assertEqual(memory_cache.get(key="e"), b"1234")
+        self.assertEqual(list(memory_cache.entries), ["f", "e"])
+
+    def test_cushead_generator_templates(self) -> None:
+        """
+        Test functions of 'cushead.generator.templates.templates'.
+        """
+        compiled_templates_folder = self.config_folder / "compiled"
+        compiled_templates_folder.mkdir()
+        templates.compile_templates(path=compiled_templates_folder)
+        self.assertEqual((compiled_templates_folder / templates.SIGNATURE_FILE_NAME).read_text(), templates.get_templates_signature())
+
+        environment = jinja2.Environment(loader=jinja2.ModuleLoader(str(compiled_templates_folder)), **templates.ENVIRONMENT_OPTIONS)
+        template_loader = templates.TemplateLoader()
+        self.assertIs(templates.TemplateLoader().template_parser, template_loader.template_parser)
+        self.assertEqual(environment.get_template("styles.jinja2").render(), template_loader.template_parser.get_template("styles.jinja2").render())
+
+        # The integrity is computed from the bytes that are written, which are rendered once.
+        styles = template_loader.render_template(path="styles.jinja2")
+        self.assertIs(template_loader.render_template(path="styles.jinja2"), styles)
+        self.assertEqual(template_loader.get_integrity(path="styles.jinja2"), templates.get_subresource_integrity(data=styles))
+
+        # The references are read from the syntax tree of the templates.
+        self.assertEqual(templates.get_template_references(path="robots.jinja2"), templates.TemplateReferences(keys=frozenset(("domain",)), templates=frozenset()))
+        self.assertEqual(templates.get_template_references(path="sw.jinja2").templates, {"index.jinja2"})
+        self.assertIn("styles.jinja2", templates.get_template_references(path="index.jinja2").templates)
+        self.assertEqual(templates.get_template_keys(path="sw.jinja2"), templates.get_template_keys(path="index.jinja2"))
+
+        # Normalizing the rendered chunks gives the same result as normalizing the whole template.
+        randomizer = random.Random(0)
+        for _ in range(500):
+            text = "".join(randomizer.choice(("\n", " ", "a")) for _ in range(randomizer.randint(0, 30)))
+            chunks = [text[position : position + 3] for position in range(0, len(text), 3)]
+            self.assertEqual(b"".join(templates.normalize_whitespaces(chunks=chunks, chunk_size=1)), re.sub("((\n +)+\n)|(\n\n$)", "\n", text).encode(), repr(text))
+
+    def test_cushead_generator_files(self) -> None:
+        """
+        Test functions of 'cushead.generator.files'.
+        """
+        graph = files.get_dependency_graph()
+        self.assertEqual(graph["static/yandex.png"].keys, {"favicon_png", "background_color", "output_folder", "png_profile"})
+        self.assertEqual(graph["static/preview-600x600.png"].sources, {"favicon_png"})
+        self.assertEqual(graph["sitemap.xml"].conditions, ({"domain"},))
+        self.assertEqual(files.get_affected_files(keys=(), sources=("favicon_svg",)), {"static/mask-icon.svg"})
+        self.assertEqual(files.get_affected_files(keys=("facebook_app_id",), sources=()), {"index.html", "sw.js"})
+        self.assertIn("static/opensearch-16x16.png", files.get_affected_files(keys=("title",), sources=()))
+        self.assertTrue(files.check_conditions(conditions=graph["humans.txt"].conditions, config={"author_name": "", "author_email": "email"}))
+        self.assertFalse(files.check_conditions(conditions=graph["static/opensearch.xml"].conditions, config={"domain": "sample.com", "title": None}))
+        # The images in modern formats are only generated if Pillow can encode them.
+        for image_format in generator_config.MODERN_IMAGE_FORMATS:
+            self.assertEqual(f"static/preview-600x600{image_format.suffix}" in graph, image_format in generator_config.get_modern_image_formats())
+
+    def test_cushead_console_assets(self) -> None:
+        """
+        Test functions of 'cushead.console.assets.assets'.
+        """
+        assets_images = assets.get_images()
+        self.assertIs(assets.get_images().favicon_png.data, assets_images.favicon_png.data)
+        self.assertEqual(assets_images.favicon_png.data, (self.config_folder / assets_images.favicon_png.name).read_bytes())
+        self.assertTrue(assets_images.favicon_png.data.readonly)
+
+    def test_cushead_console_batch(self) -> None:
+        """
+        Test functions of 'cushead.console.arguments.batch'.
+        """
+        broken_config_file = self.config_folder / "broken.json"
+        broken_config_file.write_text(self.config_file.read_text())
+        parse_config_file = config.parse_config_file
+
+        def parse_broken_config_file(*, path: pathlib.Path, **kwargs: Any) -> Iterator[files.File]:
+            if path == broken_config_file:
+                raise ValueError("image has wrong mode")
+            return parse_config_file(path=path, **kwargs)
+
+        # An unexpected error only stops the build of its site.
+        with patch.object(config, "parse_config_file", parse_broken_config_file):
+            results = list(batch.build_sites(sites=batch.get_sites(paths=[broken_config_file, self.config_file])))
+        self.assertEqual([(result.exception_type, result.exception) for result in results], [("ValueError", "image has wrong mode"), (None, None)])
+        self.assertGreater(results[1].created_files, 0)
+
+    def test_cushead_console_files_creator(self) -> None:
+        """
+        Test functions of 'cushead.console.arguments.files_creator'.
+        """
+        files_to_create = [files.File(path=self.output_folder / f"folder_{index % 3}" / f"file_{index}", data=str(index).encode()) for index in range(20)]
+        (self.output_folder / "folder_0" / "file_0").mkdir(parents=True)
+        results = list(files_creator.write_files(files_to_create=files_to_create, jobs=4))
+        self.assertEqual([result.path for result in results], [file.path for file in files_to_create])
+        self.assertEqual(results[0].error, files_creator.Error(error="IsADirectoryError", path=files_to_create[0].path))
+        self.assertTrue(all(result.written for result in results[1:]))
+        self.assertEqual(files_to_create[19].path.read_bytes(), b"19")
+        # The temporary files are removed, even when a file can't be written.
+        self.assertEqual(sum(1 for path in self.output_folder.rglob("*") if path.is_file()), 19)
+
+    def test_cushead_console_watch(self) -> None:
+        """
+        Test functions of 'cushead.console.arguments.watch'.
+        """
+        for key in ("favicon_ico", "favicon_png", "preview_png"):
+            self.config[key] = None
+        self.write_config_file()
+        watcher = watch.Watcher(path=self.config_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher.build(changes=watcher.get_changes())
+            self.assertFalse(watcher.rebuild())
+
+            index = self.output_folder / "index.html"
+            os.remove(index)
+            svg = self.output_folder / "static" / "mask-icon.svg"
+            self.config["title"] = "Watched title"
+            self.write_config_file()
+            self.assertTrue(watcher.rebuild())
+            self.assertIn("Watched title", index.read_text())
+
+            os.remove(svg)
+            (self.config_folder / "favicon_svg_scalable.svg").write_bytes(b"<svg></svg>")
+            self.assertTrue(watcher.rebuild())
+            self.assertEqual(svg.read_bytes(), b"<svg></svg>")
+
+    def test_cushead_api(self) -> None:
+        """
+        Test functions of 'cushead.api' and 'cushead.asgi'.
+        """
+        config = {key: value if key == "static_url" else None for key, value in self.config.items()}
+        generated_files = api.generate(config=config, path=self.config_folder)
+        self.assertFalse(self.output_folder.exists())
+        template_folder = self.base_folder / "templates" / "null_values"
+        self.assertEqual(generated_files, {file.relative_to(template_folder).as_posix(): file.read_bytes() for file in template_folder.rglob("*") if file.is_file()})
+
+        application = asgi.Application(files=generated_files)
+
+        def request(*, method: str, path: str, headers: Tuple[Tuple[bytes, bytes], ...] = ()) -> Tuple[int, Dict[bytes, bytes], bytes]:
+            messages: List[asgi.Message] = []
+
+            async def send(message: asgi.Message) -> None:
+                messages.append(message)
+
+            asyncio.run(application({"type": "http", "method": method, "path": path, "headers": list(headers)}, None, send))
+            return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+        status, headers, body = request(method="GET", path="/")
+        self.assertEqual((status, body), (200, generated_files["index.html"]))
+        self.assertEqual(headers[b"content-type"], b"text/html; charset=utf-8")
+        self.assertEqual(headers[b"etag"], asgi.get_etag(data=body))
+        self.assertEqual(request(method="GET", path="/robots.txt", headers=((b"if-none-match", b'"a", W/' + headers[b"etag"]),))[0], 200)
+        self.assertEqual(request(method="GET", path="/index.html", headers=((b"if-none-match", b'"a", W/' + headers[b"etag"]),))[:2], (304, {b"etag": headers[b"etag"]}))
+        self.assertEqual(request(method="HEAD", path="/sw.js")[1][b"content-type"], b"text/javascript; charset=utf-8")
+        self.assertEqual(request(method="HEAD", path="/sw.js")[2], b"")
+        self.assertEqual(request(method="GET", path="/missing")[0], 404)
+        self.assertEqual(request(method="POST", path="/")[0], 405)
+        self.assertEqual(asgi.get_content_type(path=".well-known/security"), "text/plain; charset=utf-8")
+        self.assertEqual(asgi.get_content_type(path="static/favicon-16x16.png"), "image/png")
+
+    def test_startup_imports(self) -> None:
+        """
+        Test that the arguments that don't generate files from a config don't import the heavy packages.
+        """
+        for args in (["--help"], ["--default", str(self.config_folder / "startup.json")]):
+            code = f"from cushead.console import console; console.init(args={args!r})"
+            process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=self.base_folder.parent, capture_output=True, text=True, check=False)
+            imported_packages = {line.rsplit("|", 1)[1].strip().split(".")[0] for line in process.stderr.splitlines() if line.startswith("import time:")}
+            self.assertIn("cushead", imported_packages)
+            self.assertFalse(imported_packages & {"PIL", "jinja2", "schema"}, args)
+
 
 if __name__ == "__main__":
     unittest.main()